@@ -0,0 +1,90 @@
+"""
+Micro-benchmark du formateur de transcription.
+
+Compare, à mesure que la transcription grandit, le coût d'un appel de
+l'ancienne mise en forme (regex sur tout le texte) et celui du
+TranscriptFormatter incrémental (seul le texte nouveau est parcouru).
+Vérifie d'abord le découpage en phrases sur quelques cas connus.
+
+    python benchmarks/bench_formatter.py [--chars 400000] [--step 200]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whisper_gui import TranscriptFormatter
+
+SAMPLE = ("bonjour tout le monde , voici une phrase de test.ça marche ? "
+          "oui ! encore quelques mots pour la suite ")
+
+# (texte, phrases terminées, reste en attente) : décimaux, points de
+# suspension, noms de domaine et ponctuation isolée
+CASES = [
+    ("It cost 3.5 million dollars. Wait... what? Visit example.com now",
+     ["It cost 3.5 million dollars.", "Wait...", "what?"], "Visit example.com now"),
+    ("bonjour tout le monde , ça va ? oui ! encore",
+     ["bonjour tout le monde, ça va?", "oui!"], "encore"),
+    ("il est parti ... puis revenu", ["il est parti..."], "puis revenu"),
+    ("Version 2.0 de www.example.org.", ["Version 2.0 de www.example.org."], ""),
+]
+
+
+def check():
+    """Même résultat d'un seul bloc ou mot à mot (chemin micro)."""
+    for text, sentences, tail in CASES:
+        whole = TranscriptFormatter()
+        assert (whole.feed(text), whole.flush()) == (sentences, tail), text
+        words = TranscriptFormatter()
+        fed = [s for word in text.split() for s in words.feed(word)]
+        assert (fed, words.flush()) == (sentences, tail), text
+    print(f"{len(CASES)} formatting cases OK")
+
+
+def legacy_format(raw_text: str) -> str:
+    """Ancienne version : cinq passes regex et un découpage sur tout le texte."""
+    text = raw_text.replace("\n", " ")
+    text = re.sub(r'\s*,\s*', ', ', text)
+    text = re.sub(r'\s*\.\s*', '. ', text)
+    text = re.sub(r'\s*\?\s*', '? ', text)
+    text = re.sub(r'\s*!\s*', '! ', text)
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    return "\n".join(s.strip() for s in sentences if s.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chars", type=int, default=400_000,
+                        help="taille finale de la transcription")
+    parser.add_argument("--step", type=int, default=200,
+                        help="caractères ajoutés par appel")
+    parser.add_argument("--points", type=int, default=8,
+                        help="nombre de mesures")
+    args = parser.parse_args()
+    check()
+
+    piece = (SAMPLE * (args.step // len(SAMPLE) + 1))[:args.step]
+    calls = args.chars // args.step
+    every = max(1, calls // args.points)
+
+    formatter = TranscriptFormatter()
+    full = []
+    print(f"{'size (chars)':>14} {'legacy (ms/call)':>18} {'incremental (ms/call)':>22}")
+    for i in range(1, calls + 1):
+        full.append(piece)
+        t0 = time.perf_counter()
+        formatter.feed(piece)
+        incremental = time.perf_counter() - t0
+        if i % every:
+            continue
+        t0 = time.perf_counter()
+        legacy_format("".join(full))
+        legacy = time.perf_counter() - t0
+        print(f"{i * args.step:>14} {legacy * 1e3:>18.3f} {incremental * 1e3:>22.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark du pipeline de transcription, hors ligne.
+
+Fait passer de l'audio synthétique (SyntheticAudioReader) par les chemins
+fichier et micro avec le moteur factice (FakeBackend) : ni poids, ni
+fichier audio, ni carte son. Rapporte le débit, la mémoire (tracemalloc)
+et le surcoût par étape du pipeline, c'est-à-dire tout ce qui n'est pas
+l'inférence.
+
+    python benchmarks/bench_pipeline.py [--hours 3] [--live-minutes 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whisper_gui import (ExportWriter, FakeBackend, FileTranscriber, LiveTranscriber,
+                         PipelineMetrics, SyntheticAudioReader)
+
+
+def report(title, audio_s, wall_s, backend, metrics, peak, paced=False):
+    print(f"\n== {title}")
+    print(f"audio {audio_s / 3600:.2f} h in {wall_s:.2f} s "
+          f"({audio_s / max(wall_s, 1e-9):.0f}x real time)")
+    if not paced:
+        # Le chemin micro est cadencé : seul le chemin fichier a un surcoût global
+        overhead = wall_s - backend.busy_s
+        print(f"backend {backend.busy_s:.2f} s, pipeline overhead {overhead:.2f} s "
+              f"({overhead / max(audio_s, 1e-9) * 3600:.3f} s per audio hour)")
+    else:
+        print(f"backend {backend.busy_s:.2f} s")
+    print(f"peak traced memory {peak / 2**20:.1f} MiB")
+    for stage in metrics.STAGES:
+        p = metrics.percentiles(stage)
+        if p:
+            print(f"  {stage:<8} p50 {p[0] * 1e3:8.3f} ms   p95 {p[1] * 1e3:8.3f} ms   "
+                  f"n={len(metrics.samples[stage])}")
+
+
+def bench_file(args, out_dir):
+    backend = FakeBackend(latency_s=args.latency, rtf=args.rtf)
+    reader = SyntheticAudioReader(args.hours * 3600)
+    metrics = PipelineMetrics(window=10_000)
+    writer = ExportWriter("interval", 5.0, metrics=metrics)
+    writer.set_txt(open(os.path.join(out_dir, "file.txt"), "w", encoding="utf-8"))
+
+    transcriber = FileTranscriber(
+        "synthetic", backend.load("tiny"), "tiny",
+        chunk_s=args.chunk, overlap_s=args.overlap,
+        backend=backend, reader=reader, metrics=metrics,
+        on_segment=writer.write
+    )
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    transcriber.run()
+    writer.close()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report("file path", transcriber.audio_seconds, wall, backend, metrics, peak)
+
+
+def bench_live(args, out_dir):
+    """
+    Blocs de 0.3 s injectés `--speedup` fois plus vite que le temps réel,
+    comme le ferait le callback audio.
+    """
+    backend = FakeBackend(latency_s=args.latency, rtf=args.rtf)
+    reader = SyntheticAudioReader(args.live_minutes * 60)
+    metrics = PipelineMetrics(window=10_000)
+    writer = ExportWriter("interval", 5.0, metrics=metrics)
+    writer.set_txt(open(os.path.join(out_dir, "live.txt"), "w", encoding="utf-8"))
+
+    live = LiveTranscriber(
+        backend.load("tiny"), backend=backend,
+        max_lag_s=args.max_lag, metrics=metrics,
+        on_update=lambda committed, tentative, captured_at:
+            metrics.record("display", time.time() - captured_at),
+        on_segment=lambda text, start, end: writer.write(text)
+    )
+    block = live.blocksize
+    period = block / live.sample_rate / args.speedup
+
+    tracemalloc.start()
+    thread = threading.Thread(target=live.run)
+    t0 = time.perf_counter()
+    thread.start()
+    for pos in range(0, reader.total, block):
+        live.feed(reader.samples(pos, block))
+        time.sleep(max(0.0, t0 + (pos // block + 1) * period - time.perf_counter()))
+    live.stop()
+    thread.join()
+    writer.close()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(f"live path (x{args.speedup:g})", reader.seconds, wall, backend, metrics, peak,
+           paced=True)
+    print(f"  dropped {live.dropped_samples / live.sample_rate:.1f} s audio, "
+          f"{live.dropped_blocks} notifications")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=3, help="audio for the file path")
+    parser.add_argument("--chunk", type=int, default=30)
+    parser.add_argument("--overlap", type=int, default=0)
+    parser.add_argument("--live-minutes", type=float, default=10,
+                        help="audio for the live path")
+    parser.add_argument("--speedup", type=float, default=20,
+                        help="live feed rate, in multiples of real time")
+    parser.add_argument("--max-lag", type=float, default=60,
+                        help="live path lag before audio is dropped (s)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="fake backend latency per call (s)")
+    parser.add_argument("--rtf", type=float, default=0.0,
+                        help="fake backend time per audio second")
+    parser.add_argument("--skip-live", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        bench_file(args, out_dir)
+        if not args.skip_live:
+            bench_live(args, out_dir)
+
+
+if __name__ == "__main__":
+    main()
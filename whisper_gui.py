@@ -1,17 +1,27 @@
 import sys
-import sounddevice as sd
+import time
+_T_START = time.perf_counter()   # référence des mesures de temps de démarrage
 import numpy as np
-import whisper
 import queue
 import threading
-import time
-import torch
+import importlib
 import traceback
 import math
 import re
 import os
+import json
+import hashlib
+import argparse
+import multiprocessing
+import subprocess
+import tempfile
+import itertools
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from PySide6.QtCore import Qt, QTimer, Signal, QThread, Slot, QRectF, QLocale, QTranslator
+from PySide6.QtCore import (Qt, QTimer, Signal, QThread, Slot, QRectF, QLocale, QTranslator,
+                            QSettings)
 from PySide6.QtGui import (QPainter, QColor, QLinearGradient,
                            QPainterPath, QTextCursor)
 from PySide6.QtWidgets import (
@@ -19,27 +29,1157 @@ from PySide6.QtWidgets import (
     QPushButton, QComboBox, QLabel, QHBoxLayout, QFrame, QMessageBox,
     QFileDialog, QProgressBar, QGroupBox, QFormLayout, QLineEdit, QCheckBox, QSpinBox
 )
-from docx import Document
+
+class _LazyModule:
+    """
+    Module importé au premier accès à l'un de ses attributs. torch et
+    whisper coûtent plusieurs secondes à froid : la fenêtre s'affiche
+    d'abord, le StartupThread les importe ensuite en arrière-plan.
+    """
+
+    def __init__(self, name: str):
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_lock = threading.Lock()
+
+    def _lazy_import(self):
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_import(), attr)
+
+torch = _LazyModule("torch")
+whisper = _LazyModule("whisper")
+
+_PUNCT = ",.?!"
+
+class TranscriptFormatter:
+    """
+    Mise en forme incrémentale : ponctuation isolée collée au mot précédent,
+    une phrase par ligne. Une phrase ne se termine que sur une ponctuation
+    finale (. ? !) suivie d'une espace ou de la fin du texte : nombres
+    décimaux (3.5), noms de domaine et points internes restent dans le mot,
+    une suite comme « ... » reste avec le mot qui la précède. Une seule
+    passe sur le texte nouvellement arrivé ; la phrase inachevée reste en
+    attente (`pending`).
+    """
+
+    def __init__(self, pending=()):
+        self.pending = list(pending)   # mots de la phrase en cours
+
+    def feed(self, text: str) -> list:
+        """Ajoute `text` (à la suite, séparé par une espace) ; retourne les phrases terminées."""
+        sentences = []
+        pending = self.pending
+        for word in text.split():
+            # Ponctuation en tête (« mot , suite », « mot ... ») : au mot précédent
+            lead = len(word) - len(word.lstrip(_PUNCT))
+            if lead:
+                punct, word = word[:lead], word[lead:]
+                if pending:
+                    pending[-1] += punct
+                    if not word and punct[-1] in ".?!":
+                        sentences.append(" ".join(pending))
+                        pending.clear()
+                if not word:
+                    continue
+            pending.append(word)
+            if word[-1] in ".?!":
+                sentences.append(" ".join(pending))
+                pending.clear()
+        return sentences
+
+    def flush(self) -> str:
+        """Retourne la phrase inachevée (éventuellement vide) et l'oublie."""
+        sentence = " ".join(self.pending)
+        self.pending.clear()
+        return sentence
+
+    def copy(self) -> "TranscriptFormatter":
+        return TranscriptFormatter(self.pending)
 
 def format_transcription_text(raw_text: str) -> str:
-    # 1. Fusionner les lignes
-    text = raw_text.replace("\n", " ")
-    # 2. Nettoyer ponctuation
-    text = re.sub(r'\s*,\s*', ', ', text)
-    text = re.sub(r'\s*\.\s*', '. ', text)
-    text = re.sub(r'\s*\?\s*', '? ', text)
-    text = re.sub(r'\s*!\s*', '! ', text)
-    # 3. Découper en phrases
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    # 4. Reconstruction
-    return "\n".join(s.strip() for s in sentences if s.strip())
+    """Met en forme un texte complet, une phrase par ligne."""
+    formatter = TranscriptFormatter()
+    sentences = formatter.feed(raw_text)
+    tail = formatter.flush()
+    if tail:
+        sentences.append(tail)
+    return "\n".join(sentences)
+
+_WORD_NORM_RE = re.compile(r"[^\w']+")
+
+def _norm_word(word: str) -> str:
+    """Forme normalisée d'un mot pour les comparaisons entre hypothèses."""
+    return _WORD_NORM_RE.sub("", word.lower())
+
+def suffix_prefix_overlap(tail: list, head: list) -> int:
+    """
+    Longueur du plus long suffixe de `tail` qui est aussi un préfixe de
+    `head` (fonction préfixe de KMP, temps linéaire).
+    """
+    seq = head + [None] + tail   # None : séparateur jamais égal à un mot
+    pi = [0] * len(seq)
+    for i in range(1, len(seq)):
+        k = pi[i - 1]
+        while k and seq[i] != seq[k]:
+            k = pi[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        pi[i] = k
+    return pi[-1]
+
+class VoiceActivityDetector:
+    """
+    Détection d'activité vocale légère (énergie + passages par zéro).
+
+    Le bloc est découpé en trames de `frame_ms` traitées en une seule passe
+    NumPy ; le plancher de bruit s'adapte à la pièce.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30,
+                 threshold_db: float = 9.0, min_voiced_ratio: float = 0.2):
+        self.frame            = int(sample_rate * frame_ms / 1000)
+        self.threshold_db     = threshold_db
+        self.min_voiced_ratio = min_voiced_ratio
+        self.noise_db         = -60.0   # plancher de bruit estimé
+        self.min_db           = -50.0   # en dessous : silence quoi qu'il arrive
+        self.max_zcr          = 0.35    # au-delà : bruit large bande (souffle, clavier)
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        n = len(block) // self.frame
+        if n == 0:
+            return False
+        frames = block[:n * self.frame].reshape(n, self.frame)
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10
+        db = 20 * np.log10(rms)
+        zcr = np.mean(np.diff(np.signbit(frames), axis=1), axis=1)
+
+        voiced = ((db > self.noise_db + self.threshold_db)
+                  & (db > self.min_db)
+                  & (zcr < self.max_zcr))
+
+        # Plancher de bruit : descend immédiatement, remonte lentement
+        floor = float(db.min())
+        if floor < self.noise_db:
+            self.noise_db = floor
+        else:
+            self.noise_db += 0.05 * (floor - self.noise_db)
+
+        return bool(voiced.mean() >= self.min_voiced_ratio)
+
+class AudioRingBuffer:
+    """
+    Tampon circulaire à capacité fixe pour l'audio micro.
+
+    Chaque échantillon est écrit deux fois (en i et en i + capacité) : toute
+    fenêtre d'au plus `capacity` échantillons est ainsi une vue contiguë du
+    tableau, transmise telle quelle au modèle sans copie. Un seul producteur
+    (callback PortAudio) et un seul consommateur (thread de traitement).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data    = np.zeros(2 * capacity, dtype=np.float32)
+        self.written  = 0   # nombre total d'échantillons écrits (monotone)
+
+    def write(self, block: np.ndarray):
+        n = len(block)
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        cap = self.capacity
+        pos = self.written % cap
+        first = min(n, cap - pos)
+        self._data[pos:pos + first] = block[:first]
+        self._data[pos + cap:pos + cap + first] = block[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = block[first:]
+            self._data[cap:cap + rest] = block[first:]
+        self.written += n
+
+    def oldest(self) -> int:
+        """Position absolue du plus ancien échantillon encore disponible."""
+        return max(0, self.written - self.capacity)
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """Vue contiguë sur les échantillons absolus [start, end)."""
+        start = max(start, self.oldest())
+        if end <= start:
+            return self._data[:0]
+        offset = start % self.capacity
+        return self._data[offset:offset + (end - start)]
+
+class PipelineMetrics:
+    """
+    Instrumentation du pipeline : durées par étape sur une fenêtre glissante
+    (p50/p95), facteur temps réel du décodage et jauges (profondeur de file,
+    blocs perdus...). Étapes :
+      queue   - capture du bloc -> sortie de la file
+      decode  - durée d'un décodage (et durée audio décodée, pour le RTF)
+      format  - mise en forme du texte
+      display - capture du bloc -> texte affiché (bout en bout)
+      export  - paragraphe déposé -> écrit par le thread d'export
+    Les enregistrements sont des ajouts à des deque (sûrs entre threads).
+    """
+    STAGES = ("queue", "decode", "format", "display", "export")
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.file = None
+        self.reset()
+
+    def reset(self):
+        self.samples = {stage: deque(maxlen=self.window) for stage in self.STAGES}
+        self.decoded = deque(maxlen=self.window)   # (durée décodage, durée audio)
+        self.gauges = {}
+        self.errors = 0
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+
+    def record_decode(self, seconds: float, audio_seconds: float):
+        self.samples["decode"].append(seconds)
+        self.decoded.append((seconds, audio_seconds))
+
+    def gauge(self, name: str, value):
+        self.gauges[name] = value
+
+    def percentiles(self, stage: str):
+        """(p50, p95) de l'étape, ou None sans mesure."""
+        values = list(self.samples[stage])
+        if not values:
+            return None
+        p50, p95 = np.percentile(values, [50, 95])
+        return float(p50), float(p95)
+
+    @property
+    def rtf(self) -> float:
+        decoded = list(self.decoded)
+        audio = sum(a for _, a in decoded)
+        return sum(d for d, _ in decoded) / audio if audio else 0.0
+
+    def snapshot(self) -> dict:
+        stages = {}
+        for stage in self.STAGES:
+            p = self.percentiles(stage)
+            if p:
+                stages[stage] = {"p50": p[0], "p95": p[1], "n": len(self.samples[stage])}
+        return {"time": time.time(), "stages": stages, "decode_rtf": self.rtf,
+                "errors": self.errors, **self.gauges}
+
+    def open(self, path: str):
+        """Active l'écriture des instantanés dans un fichier JSON-lines."""
+        self.close()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def write(self, **extra):
+        """Ajoute un instantané au fichier de métriques (s'il est ouvert)."""
+        if self.file:
+            self.file.write(json.dumps({**self.snapshot(), **extra}) + "\n")
+            self.file.flush()
+
+class StreamingTranscriber:
+    """
+    Décodage incrémental du flux micro.
+
+    Seule la partie non validée de l'audio est re-décodée. Un mot est validé
+    dès que deux hypothèses consécutives s'accordent sur lui (accord local),
+    l'audio correspondant est alors retiré de la fenêtre et le texte validé
+    est réinjecté comme prompt pour garder le contexte. L'audio est lu
+    directement dans l'`AudioRingBuffer`, en positions absolues.
+    """
+
+    def __init__(self, model, ring: AudioRingBuffer, sample_rate: int = 16000,
+                 min_step_s: float = 1.0, max_window_s: float = 15.0,
+                 prompt_chars: int = 200, language: str = None,
+                 metrics: PipelineMetrics = None, backend: "TranscriptionBackend" = None):
+        self.model        = model
+        self.backend      = backend or WhisperBackend()
+        self.metrics      = metrics
+        # Langue fixe, ou détectée une fois sur la première parole puis conservée
+        self.language     = language
+        self.ring         = ring
+        self.sample_rate  = sample_rate
+        self.min_step     = int(min_step_s * sample_rate)
+        self.max_window   = int(max_window_s * sample_rate)
+        self.prompt_chars = prompt_chars
+        self.context      = ""      # texte des segments précédents (prompt)
+        self.latency      = 0.0     # capture du dernier bloc -> résultat (s)
+        self.rtf          = 0.0     # temps de décodage / durée décodée
+        self.reset(0)
+
+    def reset(self, position: int):
+        """Démarre un nouveau segment à la position absolue `position`."""
+        self.start       = position   # début de l'audio non validé
+        self.end         = position   # fin de l'audio reçu
+        self.committed   = []     # mots validés du segment courant
+        self.hypothesis  = []     # [(mot, fin_en_s)] encore instables
+        self.pending     = 0      # échantillons reçus depuis le dernier décodage
+        self.last_capture = None
+
+    def extend(self, end: int, captured_at: float = None):
+        """L'audio jusqu'à la position absolue `end` est disponible."""
+        self.pending += end - self.end
+        self.end = end
+        self.last_capture = captured_at or time.time()
+
+    def skip_to(self, position: int):
+        """Abandonne l'audio non décodé avant `position` (rattrapage du retard)."""
+        if position <= self.start:
+            return
+        # L'hypothèse en cours portait sur l'audio abandonné : on la garde telle quelle
+        self.committed.extend(w for w, _ in self.hypothesis)
+        self.hypothesis = []
+        self.start = position
+        self.end = max(self.end, position)
+        self.pending = min(self.pending, self.end - self.start)
+
+    @property
+    def committed_text(self) -> str:
+        return "".join(self.committed).strip()
+
+    @property
+    def tentative_text(self) -> str:
+        return "".join(w for w, _ in self.hypothesis).strip()
+
+    def _decode(self):
+        self.start = max(self.start, self.ring.oldest())
+        audio = self.ring.view(self.start, self.end)
+        prompt = (self.context + "".join(self.committed))[-self.prompt_chars:]
+        t0 = time.time()
+        if self.language is None:
+            self.language = self.backend.detect_language(self.model, audio)
+        result = self.backend.transcribe(
+            self.model,
+            audio,
+            language=self.language,
+            initial_prompt=prompt or None,
+            condition_on_previous_text=False,
+            word_timestamps=True
+        )
+        elapsed = time.time() - t0
+        self.rtf = elapsed / max(len(audio) / self.sample_rate, 1e-3)
+        if self.metrics is not None:
+            self.metrics.record_decode(elapsed, len(audio) / self.sample_rate)
+        self.pending = 0
+        return [
+            (w["word"], w["end"])
+            for seg in result["segments"]
+            for w in seg.get("words", [])
+        ]
+
+    def process(self):
+        """
+        Décode la queue non validée si assez d'audio nouveau est arrivé.
+        Retourne (texte_validé, texte_instable) ou None si rien n'a été décodé.
+        """
+        if self.pending < self.min_step:
+            return None
+
+        words = self._decode()
+
+        # Accord local : plus long préfixe commun avec l'hypothèse précédente
+        n = 0
+        for (w_new, _), (w_old, _) in zip(words, self.hypothesis):
+            if _norm_word(w_new) != _norm_word(w_old):
+                break
+            n += 1
+
+        cut = 0.0
+        if n:
+            self.committed.extend(w for w, _ in words[:n])
+            cut = words[n - 1][1]
+        self.hypothesis = words[n:]
+
+        # Fenêtre bornée : si la parole ne se stabilise pas, on valide la
+        # moitié la plus ancienne pour garder un coût de décodage constant.
+        duration = (self.end - self.start) / self.sample_rate
+        max_dur = self.max_window / self.sample_rate
+        if duration - cut > max_dur:
+            limit = duration - max_dur / 2
+            forced = [wt for wt in self.hypothesis if wt[1] <= limit]
+            self.committed.extend(w for w, _ in forced)
+            self.hypothesis = self.hypothesis[len(forced):]
+            cut = max(cut, forced[-1][1] if forced else limit)
+
+        if cut > 0:
+            self.start = min(self.start + int(cut * self.sample_rate), self.end)
+            self.hypothesis = [(w, end - cut) for w, end in self.hypothesis]
+
+        if self.last_capture is not None:
+            self.latency = time.time() - self.last_capture
+        return self.committed_text, self.tentative_text
+
+    def finalize(self) -> str:
+        """Valide tout le segment courant (y compris la queue instable)."""
+        if self.pending and self.end > self.start:
+            self.hypothesis = self._decode()
+        self.committed.extend(w for w, _ in self.hypothesis)
+        text = self.committed_text
+        if text:
+            self.context = (self.context + " " + text)[-self.prompt_chars:]
+        self.reset(self.end)
+        return text
+
+class LiveTranscriber:
+    """
+    Pipeline micro, indépendant de Qt.
+
+    `feed` est appelé par le callback audio : copie dans le tampon circulaire
+    et notification (position, horodatage) dans une file bornée, sans jamais
+    bloquer. `run`, dans le thread de traitement, applique la politique de
+    retard, la VAD et le décodage incrémental, et clôt les segments aux
+    pauses. Les résultats sortent par callbacks : on_update(validé,
+    provisoire, capture) et on_segment(texte, début, fin), horodatages en
+    secondes epoch.
+    """
+
+    def __init__(self, model, backend: "TranscriptionBackend" = None,
+                 sample_rate: int = 16000, blocksize: int = 4800,
+                 pause_ms: int = 700, threshold_db: float = 9.0,
+                 max_lag_s: float = 5, language: str = None,
+                 max_queue_blocks: int = 64, ring_seconds: int = 60,
+                 metrics: PipelineMetrics = None,
+                 on_update=None, on_segment=None):
+        self.sample_rate = sample_rate
+        self.blocksize   = blocksize
+        self.pause_samples = int(pause_ms * sample_rate / 1000)
+        self.threshold_db  = threshold_db
+        self.max_lag     = int(max_lag_s * sample_rate)
+        self.metrics     = metrics or PipelineMetrics()
+        self.on_update   = on_update or (lambda committed, tentative, captured_at: None)
+        self.on_segment  = on_segment or (lambda text, start, end: None)
+
+        # 60 s de tampon : largement plus que la fenêtre de décodage (15 s)
+        self.ring        = AudioRingBuffer(sample_rate * ring_seconds)
+        self.audio_queue = queue.Queue(maxsize=max_queue_blocks)
+        self.streamer    = StreamingTranscriber(model, self.ring, sample_rate,
+                                                language=language, metrics=self.metrics,
+                                                backend=backend)
+        self.running         = True
+        self.queued_samples  = 0   # audio reçu du micro
+        self.dropped_samples = 0   # audio abandonné pour rester temps réel
+        self.dropped_blocks  = 0   # notifications perdues (file pleine)
+
+    def feed(self, block, captured_at: float = None):
+        """Bloc mono reçu du micro (thread audio : travail borné, sans attente)."""
+        # Copie unique dans le tampon circulaire pré-alloué ; la file ne
+        # transporte que la position de fin du bloc et son horodatage
+        self.ring.write(block)
+        self.queued_samples += len(block)
+        try:
+            self.audio_queue.put_nowait((self.ring.written, captured_at or time.time()))
+        except queue.Full:
+            # File pleine : seule la notification est perdue, l'audio reste
+            # dans le tampon et sera lu avec le bloc suivant
+            self.dropped_blocks += 1
 
-class FileTranscribeThread(QThread):
-    """Transcription d'un fichier en chunks, avec buffering de N phrases."""
-    progress     = Signal(int, int)    # (current_chunk, total_chunks)
-    segment      = Signal(str)         # paragraphes formatés
-    audio_chunk  = Signal(object)      # pour l'affichage du waveform
-    done         = Signal()
+    def stop(self):
+        """Demande l'arrêt ; `run` valide le segment en cours avant de rendre la main."""
+        self.running = False
+
+    def run(self):
+        """Boucle du thread de traitement, jusqu'à `stop`."""
+        streamer = self.streamer
+        vad = VoiceActivityDetector(self.sample_rate, threshold_db=self.threshold_db)
+        in_speech = False
+        silence = 0        # échantillons de silence depuis la dernière parole
+        position = 0       # position absolue de lecture dans le tampon circulaire
+        segment_start = None
+        try:
+            while self.running:
+                # Attente bloquante du prochain bloc, puis on draine tout ce qui
+                # est en attente pour le traiter en un seul décodage
+                try:
+                    end, captured_at = self.audio_queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                # Attente du plus ancien bloc en file
+                self.metrics.record("queue", time.time() - captured_at)
+                while True:
+                    try:
+                        end, captured_at = self.audio_queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                # Politique de débordement : au-delà de `max_lag` de retard,
+                # l'audio le plus ancien est abandonné (et comptabilisé)
+                oldest = max(end - self.max_lag, self.ring.oldest())
+                if position < oldest:
+                    self.dropped_samples += oldest - position
+                    position = oldest
+                    if in_speech:
+                        streamer.skip_to(position)
+
+                block_start, position = position, end
+                frames = position - block_start
+                block = self.ring.view(block_start, position)
+
+                if vad.is_speech(block):
+                    if not in_speech:
+                        in_speech = True
+                        segment_start = captured_at - frames / self.sample_rate
+                        # Un bloc de pré-roll pour ne pas couper l'attaque
+                        streamer.reset(max(block_start - self.blocksize, self.ring.oldest()))
+                    streamer.extend(position, captured_at)
+                    silence = 0
+                elif in_speech:
+                    # Silence après de la parole : on garde un peu de queue
+                    # puis on clôt le segment à la première vraie pause
+                    streamer.extend(position, captured_at)
+                    silence += frames
+                    if silence >= self.pause_samples:
+                        in_speech = False
+                        try:
+                            text = streamer.finalize()
+                        except Exception as e:
+                            print(f"Error in transcription: {e}")
+                            traceback.print_exc()
+                            self.metrics.errors += 1
+                            streamer.reset(position)
+                            text = ""
+                        self.on_segment(text, segment_start,
+                                        captured_at - silence / self.sample_rate)
+                        continue
+                else:
+                    # Silence pur : aucun décodage
+                    continue
+
+                try:
+                    # Décodage incrémental de la partie non validée uniquement
+                    update = streamer.process()
+                    if update is not None:
+                        committed, tentative = update
+                        self.on_update(committed, tentative, streamer.last_capture)
+                except Exception as e:
+                    print(f"Error in transcription: {e}")
+                    traceback.print_exc()
+                    self.metrics.errors += 1
+
+            # Arrêt : on valide ce qui reste dans le buffer
+            if in_speech:
+                self.on_segment(streamer.finalize(), segment_start, time.time())
+
+        except Exception as e:
+            print(f"Error in process_audio: {e}")
+            traceback.print_exc()
+            self.metrics.errors += 1
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg")
+
+def auto_chunk_seconds(total_seconds: float, default: int) -> int:
+    """Durée de chunk adaptée à la longueur du fichier."""
+    if total_seconds > 2 * 3600:
+        return 120
+    if total_seconds > 3600:
+        return 60
+    if total_seconds > 30 * 60:
+        return 45
+    return default
+
+AudioChunk = namedtuple("AudioChunk", "index start length data is_last")
+
+_FFMPEG_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+class AudioFileReader:
+    """
+    Lecture incrémentale d'un fichier audio en PCM 16 kHz mono.
+
+    ffmpeg décode dans un pipe lu chunk par chunk : la mémoire utilisée est
+    bornée par la taille d'un chunk, quelle que soit la durée du fichier.
+    La durée est lue dans les métadonnées du conteneur (ffprobe).
+    """
+
+    def __init__(self, path: str, sample_rate: int = 16000):
+        self.path        = path
+        self.sample_rate = sample_rate
+
+    def duration(self):
+        """Durée en secondes d'après le conteneur, ou None si inconnue."""
+        cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+               "-of", "default=noprint_wrappers=1:nokey=1", self.path]
+        try:
+            out = subprocess.run(cmd, capture_output=True, check=True, text=True).stdout
+            return float(out.strip())
+        except (OSError, ValueError, subprocess.CalledProcessError):
+            pass
+        # Sans ffprobe : en-tête affiché par ffmpeg (aucun décodage)
+        try:
+            err = subprocess.run(["ffmpeg", "-nostdin", "-i", self.path],
+                                 capture_output=True, text=True).stderr
+        except OSError:
+            return None
+        m = _FFMPEG_DURATION_RE.search(err)
+        if not m:
+            return None
+        h, mnt, sec = m.groups()
+        return int(h) * 3600 + int(mnt) * 60 + float(sec)
+
+    def _read(self, stream, n: int) -> np.ndarray:
+        raw = stream.read(n * 2)
+        return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+    def chunks(self, size: int, step: int, first: int = 0):
+        """
+        Fenêtres de `size` échantillons tous les `step` échantillons
+        (recouvrement de size - step), à partir de la fenêtre `first`.
+        Une fenêtre est lue d'avance pour savoir laquelle est la dernière.
+        Lève RuntimeError (avec la fin du message de ffmpeg) si le décodage
+        échoue ou ne produit aucun échantillon.
+        """
+        seek = ["-ss", str(first * step / self.sample_rate)] if first else []
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-threads", "0", *seek, "-i", self.path,
+               "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+               "-ar", str(self.sample_rate), "-"]
+        # stderr dans un fichier temporaire : un tube plein bloquerait ffmpeg
+        err = tempfile.TemporaryFile()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        try:
+            data = self._read(proc.stdout, size)
+            decoded = len(data) > 0
+            index = first
+            while len(data):
+                new = self._read(proc.stdout, step) if len(data) == size else data[:0]
+                yield AudioChunk(index, index * step, len(data), data, len(new) == 0)
+                if not len(new):
+                    break
+                data = np.concatenate([data[step:], new])
+                index += 1
+
+            # Fin du flux : ffmpeg doit s'être terminé proprement. Une reprise
+            # au-delà de la fin (first > 0) peut légitimement ne rien lire.
+            if proc.wait() != 0 or not (decoded or first):
+                err.seek(0)
+                tail = err.read()[-2000:].decode("utf-8", "replace").strip()
+                raise RuntimeError(
+                    f"ffmpeg could not decode {self.path} "
+                    f"(exit code {proc.returncode}): {tail or 'no audio'}"
+                )
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:   # arrêt anticipé ou abandon
+                proc.kill()
+            proc.wait()
+            err.close()
+
+class SyntheticAudioReader:
+    """
+    Source audio synthétique et déterministe, même interface que
+    AudioFileReader : des secondes de « parole » (son harmonique modulé en
+    syllabes) et de pauses, générées à la demande. Permet de faire tourner
+    le pipeline sur des heures d'audio sans fichier ni ffmpeg.
+    """
+
+    def __init__(self, seconds: float, sample_rate: int = 16000, seed: int = 0,
+                 speech_ratio: float = 0.8):
+        self.seconds = seconds
+        self.sample_rate = sample_rate
+        self.seed = seed
+        self.speech_ratio = speech_ratio
+        self.total = int(seconds * sample_rate)
+        # Banque de secondes pré-calculées, tirées au sort pour chaque seconde
+        rng = np.random.default_rng(seed)
+        t = np.arange(sample_rate) / sample_rate
+        self._bank = [(rng.standard_normal(sample_rate) * 1e-3).astype(np.float32)]
+        for _ in range(31):
+            f0 = rng.uniform(100, 250)
+            voice = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in (1, 2, 3))
+            syllables = (0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)) ** 2
+            self._bank.append((0.1 * voice * syllables).astype(np.float32))
+
+    def duration(self) -> float:
+        return self.seconds
+
+    def _second(self, sec: int) -> np.ndarray:
+        # Tirage reproductible d'après (graine, seconde) : accès aléatoire possible
+        h = (sec * 2654435761 + self.seed) % 2 ** 32 / 2 ** 32
+        if h >= self.speech_ratio:
+            return self._bank[0]
+        return self._bank[1 + int(h / self.speech_ratio * 31)]
+
+    def samples(self, start: int, n: int) -> np.ndarray:
+        """Échantillons absolus [start, start + n), tronqués à la durée."""
+        end = min(start + n, self.total)
+        out = np.empty(max(0, end - start), dtype=np.float32)
+        sr = self.sample_rate
+        for sec in range(start // sr, -(-end // sr)):
+            lo, hi = max(start, sec * sr), min(end, (sec + 1) * sr)
+            out[lo - start:hi - start] = self._second(sec)[lo - sec * sr:hi - sec * sr]
+        return out
+
+    def chunks(self, size: int, step: int, first: int = 0):
+        """Mêmes fenêtres que AudioFileReader.chunks."""
+        index = first
+        while index * step < self.total:
+            start = index * step
+            data = self.samples(start, size)
+            yield AudioChunk(index, start, len(data), data, start + size >= self.total)
+            if start + size >= self.total:
+                break
+            index += 1
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "whisper_gui")
+
+def file_content_hash(path: str, block_size: int = 1 << 20, should_stop=None) -> str:
+    """
+    Empreinte SHA-256 du contenu d'un fichier, lu par blocs. Retourne None
+    si `should_stop()` devient vrai en cours de lecture.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            if should_stop is not None and should_stop():
+                return None
+            h.update(block)
+    return h.hexdigest()
+
+class TranscriptCache:
+    """
+    Cache disque des segments transcrits, chunk par chunk.
+
+    La clé combine l'empreinte du contenu audio et les paramètres qui
+    changent le décodage (modèle, précision, chunk_s, beam_size, best_of…) ;
+    le regroupement en paragraphes (spp) n'en fait pas partie. Un fichier
+    JSON-lines par clé, une ligne par chunk terminé, plus un marqueur de fin.
+    """
+
+    def __init__(self, directory: str = os.path.join(CACHE_DIR, "transcripts")):
+        self.directory = directory
+
+    @staticmethod
+    def make_key(audio_hash: str, **params) -> str:
+        blob = json.dumps({"audio": audio_hash, **params}, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".jsonl")
+
+    def load(self, key: str):
+        """Retourne ({index: enregistrement}, complet)."""
+        records, complete = {}, False
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue   # dernière ligne tronquée par un arrêt brutal
+                    if rec.get("complete"):
+                        complete = True
+                    else:
+                        records[rec["index"]] = rec
+        except OSError:
+            pass
+        # Un marqueur sans aucun chunk (décodage raté) ne vaut pas transcription
+        return records, complete and bool(records)
+
+    def append(self, key: str, chunk, segments: list):
+        os.makedirs(self.directory, exist_ok=True)
+        rec = {"index": chunk.index, "start": chunk.start, "length": chunk.length,
+               "last": chunk.is_last, "segments": segments}
+        with open(self._path(key), "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+
+    def mark_complete(self, key: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"complete": True}) + "\n")
+
+class CheckpointStore:
+    """
+    Points de reprise des transcriptions de fichiers longues : un JSON par
+    contenu audio, réécrit de façon atomique après chaque chunk.
+    """
+
+    def __init__(self, directory: str = os.path.join(CACHE_DIR, "checkpoints")):
+        self.directory = directory
+
+    def _path(self, audio_hash: str) -> str:
+        return os.path.join(self.directory, audio_hash + ".json")
+
+    def load(self, audio_hash: str):
+        try:
+            with open(self._path(audio_hash), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, audio_hash: str, state: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(audio_hash)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def discard(self, audio_hash: str):
+        try:
+            os.remove(self._path(audio_hash))
+        except OSError:
+            pass
+
+# Nombre approximatif de paramètres (millions), pour estimer la mémoire avant chargement
+_MODEL_PARAMS_M = {"tiny": 39, "base": 74, "small": 244, "medium": 769, "large": 1550}
+
+# Précisions proposées et octets par paramètre (estimation mémoire)
+PRECISIONS = ["fp32", "fp16", "int8-dynamic"]
+_PRECISION_BYTES = {"fp32": 4, "fp16": 2, "int8-dynamic": 1}
+
+def effective_precision(precision: str, device: str) -> str:
+    """fp16 n'a de sens que sur GPU, l'int8 dynamique que sur CPU."""
+    device_type = str(device).split(":")[0]
+    if precision == "fp16" and device_type == "cuda":
+        return precision
+    if precision == "int8-dynamic" and device_type == "cpu":
+        return precision
+    return "fp32"
+
+def apply_precision(model, precision: str):
+    """Convertit un modèle fraîchement chargé vers la précision demandée."""
+    if precision == "fp16":
+        model.half()
+        # Les LayerNorm de whisper calculent en fp32 : leurs poids aussi
+        for m in model.modules():
+            if isinstance(m, torch.nn.LayerNorm):
+                m.float()
+    elif precision == "int8-dynamic":
+        # quantize_dynamic ne reconnaît que nn.Linear exactement ; la sous-classe
+        # de whisper ne fait que convertir les poids au type de l'entrée (fp32 ici)
+        for m in model.modules():
+            if type(m) is whisper.model.Linear:
+                m.__class__ = torch.nn.Linear
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    return model
+
+# Threads intra-op choisis par torch lui-même (cœurs physiques, ou
+# OMP_NUM_THREADS), relevés avant tout changement
+_TORCH_DEFAULT_THREADS = None
+
+def apply_cpu_threads(intra: int = 0, inter: int = 0) -> bool:
+    """
+    Threads CPU de torch ; 0 = automatique, c'est-à-dire le défaut de torch
+    (cœurs physiques, ou OMP_NUM_THREADS s'il est défini). Le nombre
+    inter-op ne peut être fixé qu'avant le premier calcul parallèle :
+    retourne False s'il est trop tard.
+    """
+    global _TORCH_DEFAULT_THREADS
+    if _TORCH_DEFAULT_THREADS is None:
+        _TORCH_DEFAULT_THREADS = torch.get_num_threads()
+    torch.set_num_threads(intra or _TORCH_DEFAULT_THREADS)
+    if inter and inter != torch.get_num_interop_threads():
+        try:
+            torch.set_num_interop_threads(inter)
+        except RuntimeError:
+            return False
+    return True
+
+def compile_encoder(model, enabled: bool = True):
+    """
+    Compile l'encodeur avec torch.compile, ou le restaure. Le modèle est
+    celui du registre : la version compilée sert pour toute la session. La
+    compilation a lieu au premier passage, c'est-à-dire au préchauffage.
+    """
+    compiled = hasattr(model.encoder, "_orig_mod")
+    if enabled and not compiled and hasattr(torch, "compile"):
+        model.encoder = torch.compile(model.encoder)
+    elif not enabled and compiled:
+        model.encoder = model.encoder._orig_mod
+    return model
+
+def detect_language(model, audio) -> str:
+    """Langue dominante d'un extrait (un passage encodeur + détection)."""
+    if not model.is_multilingual:
+        return "en"
+    mel = whisper.log_mel_spectrogram(
+        whisper.pad_or_trim(audio), n_mels=model.dims.n_mels, device=model.device
+    )
+    if uses_fp16(model):
+        mel = mel.half()
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+def uses_fp16(model) -> bool:
+    """Vrai si les poids du modèle sont en fp16 (décodage à lancer en fp16)."""
+    return next(model.parameters()).dtype == torch.float16
+
+def _model_nbytes(model) -> int:
+    """Taille mémoire réelle des poids et buffers d'un modèle."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+class ModelRegistry:
+    """
+    Cache des modèles chargés, indexé par (nom, device, précision).
+
+    Politique LRU bornée par un budget mémoire appliqué séparément à chaque
+    type de device (RAM pour le CPU, VRAM pour le GPU) : les modèles les
+    moins récemment utilisés sont libérés avant un chargement qui dépasserait
+    le budget. Le modèle demandé est toujours chargé, même s'il dépasse seul
+    le budget.
+
+    Le verrou n'est pas tenu pendant un chargement (téléchargement compris) :
+    les demandes concurrentes de la même clé attendent ce chargement, les
+    autres opérations (set_budget depuis le GUI…) restent immédiates.
+    """
+
+    def __init__(self, budget_mb: int = 4096):
+        self.budget_mb = budget_mb
+        self._models   = OrderedDict()   # clé -> (modèle, taille en octets)
+        self._loading  = {}              # clé -> Event, chargements en cours
+        self._lock     = threading.RLock()
+
+    @staticmethod
+    def _device_type(device: str) -> str:
+        return str(device).split(":")[0]
+
+    def _usage(self, device_type: str) -> int:
+        return sum(size for (_, dev, _), (_, size) in self._models.items()
+                   if self._device_type(dev) == device_type)
+
+    def _evict(self, device_type: str, needed: int):
+        budget = self.budget_mb * 1024 * 1024
+        for key in list(self._models):
+            if self._usage(device_type) + needed <= budget:
+                break
+            if self._device_type(key[1]) == device_type:
+                del self._models[key]
+        if device_type == "cuda":
+            try:
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def get(self, model_name: str, device: str = "cpu", precision: str = "fp32"):
+        precision = effective_precision(precision, device)
+        key = (model_name, str(device), precision)
+        while True:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    return entry[0]
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    device_type = self._device_type(device)
+                    params_m = _MODEL_PARAMS_M.get(re.split(r"[.-]", model_name)[0], 0)
+                    estimate = params_m * _PRECISION_BYTES[precision] * 1024 * 1024
+                    self._evict(device_type, estimate)
+                    break
+            # Même modèle en cours de chargement ailleurs : on attend puis on relit
+            loading.wait()
+
+        try:
+            model = whisper.load_model(model_name, device=device)
+            model = apply_precision(model, precision)
+            size = _model_nbytes(model)
+            with self._lock:
+                self._models[key] = (model, size)
+            return model
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def set_budget(self, budget_mb: int):
+        with self._lock:
+            self.budget_mb = budget_mb
+            for device_type in {self._device_type(dev) for _, dev, _ in self._models}:
+                self._evict(device_type, 0)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+MODEL_REGISTRY = ModelRegistry()
+
+class TranscriptionBackend(ABC):
+    """
+    Moteur de transcription utilisé par les chemins fichier et micro.
+
+    `load` retourne un modèle opaque, passé ensuite à `transcribe` et
+    `detect_language`. `transcribe` retourne un dict à la manière de
+    whisper : {"segments": [{"start", "end", "text"[, "words"]}]}, avec des
+    temps relatifs à l'extrait. Un moteur incomplet échoue dès sa création.
+    """
+    name = None
+    supports_batching = False   # décodage par lots (internes de whisper)
+
+    @abstractmethod
+    def load(self, model_name: str, device: str = "cpu", precision: str = "fp32"):
+        """Retourne le modèle à passer aux autres méthodes."""
+
+    @abstractmethod
+    def transcribe(self, model, audio, **options) -> dict:
+        """Transcrit un extrait (float32, 16 kHz)."""
+
+    @abstractmethod
+    def detect_language(self, model, audio) -> str:
+        """Code de la langue dominante de l'extrait."""
+
+    def warmup(self, model):
+        """Premier décodage, fait au chargement plutôt qu'au premier usage."""
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper, modèles partagés par le registre."""
+    name = "whisper"
+    supports_batching = True
+
+    def load(self, model_name: str, device: str = "cpu", precision: str = "fp32"):
+        return MODEL_REGISTRY.get(model_name, device, precision)
+
+    def transcribe(self, model, audio, **options) -> dict:
+        options.setdefault("fp16", uses_fp16(model))
+        return model.transcribe(audio, **options)
+
+    def detect_language(self, model, audio) -> str:
+        return detect_language(model, audio)
+
+    def warmup(self, model):
+        # Sélection des noyaux, croissance de l'allocateur, compilation
+        # éventuelle : une fois par encodeur, sur du bruit synthétique
+        if getattr(model, "_warm_encoder", None) == id(model.encoder):
+            return
+        audio = np.random.default_rng(0).normal(0, 0.05, 2 * 16000).astype(np.float32)
+        self.transcribe(model, audio, language="en", temperature=0.0,
+                        condition_on_previous_text=False)
+        model._warm_encoder = id(model.encoder)
+
+_FAKE_WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf",
+               "hotel", "india", "juliett", "kilo", "lima", "mike", "november")
+
+class FakeBackend(TranscriptionBackend):
+    """
+    Moteur factice pour mesurer le pipeline sans poids ni inférence : un
+    mot par tranche de `word_s` secondes non silencieuse, choisi d'après
+    l'énergie de la tranche (même audio, même texte), une phrase tous les
+    `words_per_sentence` mots. Chaque appel dure `latency_s` plus `rtf`
+    fois la durée de l'extrait.
+    """
+    name = "fake"
+
+    def __init__(self, latency_s: float = 0.0, rtf: float = 0.0, word_s: float = 0.4,
+                 words_per_sentence: int = 12, language: str = "en"):
+        self.latency_s = latency_s
+        self.rtf = rtf
+        self.word_s = word_s
+        self.words_per_sentence = words_per_sentence
+        self.language = language
+        self.busy_s = 0.0   # temps total passé dans transcribe
+
+    def load(self, model_name: str, device: str = "cpu", precision: str = "fp32"):
+        return f"fake-{model_name}"
+
+    def transcribe(self, model, audio, sample_rate: int = 16000, **options) -> dict:
+        t0 = time.perf_counter()
+        duration = len(audio) / sample_rate
+        step = int(self.word_s * sample_rate)
+        n = len(audio) // step
+        energy = np.einsum("ij,ij->i", *(2 * [audio[:n * step].reshape(n, step)])) / step
+
+        words = []
+        for i in np.flatnonzero(energy > 1e-4).tolist():
+            word = _FAKE_WORDS[int(energy[i] * 1e5) % len(_FAKE_WORDS)]
+            if (len(words) + 1) % self.words_per_sentence == 0:
+                word += "."
+            words.append({"word": " " + word, "start": i * self.word_s,
+                          "end": (i + 1) * self.word_s})
+        segments = [
+            {"start": ws[0]["start"], "end": ws[-1]["end"],
+             "text": "".join(w["word"] for w in ws), "words": ws}
+            for ws in (words[k:k + self.words_per_sentence]
+                       for k in range(0, len(words), self.words_per_sentence))
+        ]
+
+        remaining = self.latency_s + self.rtf * duration - (time.perf_counter() - t0)
+        if remaining > 0:
+            time.sleep(remaining)
+        self.busy_s += time.perf_counter() - t0
+        return {"segments": segments, "language": self.language}
+
+    def detect_language(self, model, audio) -> str:
+        return self.language
+
+BACKENDS = {"whisper": WhisperBackend, "fake": FakeBackend}
+
+def get_backend(name: str = None) -> TranscriptionBackend:
+    """Moteur choisi par nom, sinon par WHISPER_GUI_BACKEND (whisper par défaut)."""
+    name = name or os.environ.get("WHISPER_GUI_BACKEND", "whisper")
+    if name == "fake":
+        return FakeBackend(latency_s=float(os.environ.get("WHISPER_GUI_FAKE_LATENCY", 0)))
+    return BACKENDS[name]()
+
+def _auto_batch_size(model, beam_size: int, limit: int = 32) -> int:
+    """Taille de lot estimée d'après la VRAM libre et les dimensions du modèle."""
+    if model.device.type != "cuda":
+        return 1
+    free, _ = torch.cuda.mem_get_info(model.device)
+    d = model.dims
+    bytes_el = next(model.parameters()).element_size()
+    # Activations et attention de l'encodeur + caches clé/valeur du décodeur (par faisceau)
+    per_item = bytes_el * (
+        8 * d.n_audio_ctx * d.n_audio_state
+        + d.n_audio_head * d.n_audio_ctx ** 2
+        + beam_size * d.n_text_layer * 2 * (d.n_text_ctx + d.n_audio_ctx) * d.n_text_state
+    )
+    return int(max(1, min(limit, free * 0.6 // per_item)))
+
+def _segments_from_tokens(tokenizer, tokens, offset: float, duration: float) -> list:
+    """Segments horodatés à partir des jetons d'une fenêtre de 30 s."""
+    segments, text_tokens, start = [], [], None
+    for tok in tokens:
+        if tok >= tokenizer.timestamp_begin:
+            ts = (tok - tokenizer.timestamp_begin) * 0.02
+            if text_tokens:
+                segments.append({"start": offset + (start or 0.0), "end": offset + ts,
+                                 "text": tokenizer.decode(text_tokens)})
+                text_tokens, start = [], None
+            else:
+                start = ts
+        else:
+            text_tokens.append(tok)
+    if text_tokens:
+        segments.append({"start": offset + (start or 0.0), "end": offset + duration,
+                         "text": tokenizer.decode(text_tokens)})
+    return segments
+
+# Moteur et modèle propres à chaque processus du pool de transcription parallèle
+_pool_backend = None
+_pool_model = None
+
+def _pool_init(backend: TranscriptionBackend, model_name: str, precision: str, threads: int):
+    global _pool_backend, _pool_model
+    if threads:   # 0 : moteur sans torch
+        torch.set_num_threads(threads)
+    _pool_backend = backend
+    _pool_model = backend.load(model_name, "cpu", precision)
+
+def _pool_transcribe(chunk_data, options: dict) -> list:
+    res = _pool_backend.transcribe(_pool_model, chunk_data, **options)
+    return [{"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+            for seg in res["segments"]]
+
+class FileTranscriber:
+    """
+    Transcription d'un fichier en chunks, avec buffering de N phrases.
+
+    Indépendant de Qt : l'avancement, les paragraphes et l'audio des chunks
+    sont transmis par des callbacks (signaux du FileTranscribeThread dans
+    l'interface, affichage console en mode batch).
+    """
 
     def __init__(
         self,
@@ -49,242 +1189,1047 @@ class FileTranscribeThread(QThread):
         chunk_s: int = 30,
         spp: int = 3,
         beam_size: int = 5,
-        best_of: int = 5
+        best_of: int = 5,
+        overlap_s: int = 0,
+        workers: int = 1,
+        batched: bool = False,
+        batch_size: int = 0,
+        precision: str = "fp32",
+        language: str = None,
+        cache: TranscriptCache = None,
+        checkpoints: CheckpointStore = None,
+        resume: dict = None,
+        metrics: PipelineMetrics = None,
+        backend: TranscriptionBackend = None,
+        reader=None,
+        audio_hash: str = None,
+        on_progress=None,
+        on_segment=None,
+        on_audio_chunk=None
     ):
-        super().__init__()
         self.infile    = infile
         self.model     = model
+        # Moteur de transcription et source audio (fichier via ffmpeg par défaut)
+        self.backend   = backend or WhisperBackend()
+        self.reader    = reader
         self.model_name= model_name
         self.chunk_s   = chunk_s
         self.spp       = spp
         self.beam_size = beam_size
         self.best_of   = best_of
+        # Recouvrement entre chunks successifs (au plus la moitié d'un chunk)
+        self.overlap_s = max(0, min(overlap_s, chunk_s // 2))
+        # Nombre de processus pour le mode parallèle (CPU uniquement)
+        self.workers   = max(1, workers)
+        # Décodage par lots sur GPU (taille 0 = choisie d'après la VRAM libre)
+        self.batched    = batched
+        self.batch_size = batch_size
+        if batched and self.backend.supports_batching:
+            # Décodage glouton en lot, fenêtres douteuses re-décodées avec les
+            # réglages par défaut de whisper.transcribe : beam_size et best_of
+            # de l'appelant ne servent pas (ni dans la clé du cache)
+            self.beam_size, self.best_of = None, 5
+        # Précision des modèles chargés par les workers du mode parallèle
+        self.precision  = precision
+        # Langue fixe, ou None : détectée sur le premier chunk parlé
+        self.language   = language
+
+        # Cache disque des segments par chunk (None : désactivé)
+        self.cache      = cache
+        self.cache_key  = None
+        # Points de reprise après chaque chunk, et état à reprendre éventuel
+        self.checkpoints = checkpoints
+        self.resume      = resume
+        # Empreinte du contenu si l'appelant l'a déjà calculée (sinon : au lancement)
+        self.audio_hash  = audio_hash
+        # Instrumentation (None : désactivée)
+        self.metrics     = metrics
+
+        # Callbacks : (current_chunk, total_chunks), paragraphe, audio du chunk
+        self.on_progress    = on_progress or (lambda current, total: None)
+        self.on_segment     = on_segment or (lambda text: None)
+        self.on_audio_chunk = on_audio_chunk or (lambda data: None)
+
+        # Durée d'audio traitée (s), pour le facteur temps réel, dont la
+        # part rétablie depuis un point de reprise
+        self.audio_seconds = 0.0
+        self.resumed_seconds = 0.0
 
         self._abort    = False
-        self.splitter  = re.compile(r'(?<=[\.\?\!])\s+')
+        self.formatter = TranscriptFormatter()
         self.buffer    = []
+        self.paragraphs = []   # paragraphes déjà émis (pour la reprise)
+
+        # État du raccord entre chunks (mode recouvrement)
+        self._emitted_until = 0.0   # fin (s) du dernier segment émis
+        self._tail_words    = []    # derniers mots émis, normalisés
+        self._tail_max      = 64
 
     def run(self):
-        # 1) Pré‐charger un modèle CPU de secours
-        cpu_model = whisper.load_model(self.model_name, device="cpu")
+        """Transcrit tout le fichier ; les erreurs remontent à l'appelant."""
+        reader = self.reader or AudioFileReader(self.infile)
+        sr = reader.sample_rate
+        sz = self.chunk_s * sr
+        step = (self.chunk_s - self.overlap_s) * sr
+        # Nombre de chunks estimé d'après les métadonnées (0 si inconnu)
+        duration = reader.duration()
+        chunks = 1 + math.ceil(max(0, duration * sr - sz) / step) if duration else 0
+        expected = chunks
+
+        # Paramètres de départ (avant détection de la langue), clé de reprise
+        self._initial_params = self._resume_params()
+        if (self.cache is not None or self.checkpoints is not None) and self.audio_hash is None:
+            self.audio_hash = file_content_hash(self.infile)
+
+        # Reprise : on repart du premier chunk non terminé
+        first = 0
+        if self.resume is not None:
+            if self.resume.get("params") == self._initial_params:
+                first = self._restore(self.resume)
+            else:
+                print("Point de reprise ignoré : paramètres différents.")
+        self.on_progress(first, chunks)
+
+        cached, complete = {}, False
+        if self.cache is not None:
+            params = {k: v for k, v in self._initial_params.items() if k != "spp"}
+            self.cache_key = self.cache.make_key(self.audio_hash, **params)
+            cached, complete = self.cache.load(self.cache_key)
+
+        if complete:
+            # Tout est en cache : ni décodage audio ni inférence
+            results = (
+                (AudioChunk(r["index"], r["start"], r["length"], None, r["last"]), r["segments"])
+                for i, r in sorted(cached.items()) if i >= first
+            )
+        else:
+            results = self._with_cache(reader.chunks(sz, step, first), cached)
+
+        # Les résultats arrivent dans l'ordre des chunks
+        last = time.perf_counter()
+        final = None   # dernier chunk traité
+        for chunk, segments in results:
+            final = chunk
+            start = chunk.start / sr
+            end = start + chunk.length / sr
+            t0 = time.perf_counter()
+            # Raccord puis bufferisation comme avant
+            texts = self._stitch(segments, start, end, chunk.is_last)
+            for text in texts:
+                self._push_text(text)
+            if self.metrics is not None:
+                # Temps écoulé depuis le chunk précédent : débit effectif,
+                # quel que soit le mode (séquentiel, lots, parallèle, cache)
+                self.metrics.record_decode(t0 - last, chunk.length / sr)
+                self.metrics.record("format", time.perf_counter() - t0)
+            last = time.perf_counter()
+
+            self.audio_seconds = end
+            if self.checkpoints is not None:
+                self.checkpoints.save(self.audio_hash, self._checkpoint(chunk.index + 1))
+            chunks = max(chunks, chunk.index + 1)
+            self.on_progress(chunk.index + 1, chunks)
+
+        if self._abort:
+            return
+        if self.cache is not None and not complete and self._decoded_whole(final, expected):
+            self.cache.mark_complete(self.cache_key)
 
-        try:
-            audio = whisper.load_audio(self.infile)
-            sr, total = whisper.audio.SAMPLE_RATE, audio.shape[0]
-            sz = self.chunk_s * sr
-            chunks = math.ceil(total / sz)
-            self.progress.emit(0, chunks)
+        # flush final (phrase inachevée comprise)
+        self._push_sentence(self.formatter.flush())
+        if self.buffer:
+            self._emit(" ".join(self.buffer))
+            self.buffer.clear()
 
-            use_cpu = False  # flag pour basculer définitivement
+        if self.checkpoints is not None:
+            self.checkpoints.discard(self.audio_hash)
 
-            for i in range(chunks):
-                if self._abort:
-                    break
+    @staticmethod
+    def _decoded_whole(final, expected: int) -> bool:
+        """
+        Le décodage est allé jusqu'au dernier chunk, et leur nombre concorde
+        avec la durée annoncée (à un chunk près : métadonnées arrondies).
+        """
+        if final is None or not final.is_last:
+            return False
+        return not expected or abs(final.index + 1 - expected) <= 1
+
+    def _resume_params(self) -> dict:
+        """Paramètres qui doivent être identiques pour reprendre un travail."""
+        return {**self._decode_params(), "spp": self.spp}
+
+    def _checkpoint(self, next_chunk: int) -> dict:
+        return {
+            "params": self._initial_params,
+            "next_chunk": next_chunk,
+            "paragraphs": self.paragraphs,
+            "buffer": self.buffer,
+            "pending": self.formatter.pending,
+            "emitted_until": self._emitted_until,
+            "tail_words": self._tail_words,
+            "language": self.language,
+            "audio_seconds": self.audio_seconds,
+        }
+
+    def _restore(self, state: dict) -> int:
+        """Rétablit l'état d'un point de reprise ; retourne le chunk suivant."""
+        for para in state["paragraphs"]:
+            self._emit(para)
+        self.buffer = list(state["buffer"])
+        self.formatter = TranscriptFormatter(state.get("pending", ()))
+        self._emitted_until = state["emitted_until"]
+        self._tail_words = list(state["tail_words"])
+        self.language = state["language"]
+        self.audio_seconds = self.resumed_seconds = state["audio_seconds"]
+        return state["next_chunk"]
+
+    def _decode_params(self) -> dict:
+        """Paramètres qui influent sur les segments produits (clé du cache)."""
+        return {
+            "model": self.model_name, "precision": self.precision,
+            "chunk_s": self.chunk_s, "overlap_s": self.overlap_s,
+            "beam_size": self.beam_size, "best_of": self.best_of,
+            "language": self.language, "batched": self.batched,
+            "backend": self.backend.name,
+        }
+
+    def _with_cache(self, source, cached: dict):
+        """
+        Les chunks déjà en cache sont rendus tels quels, à leur place et sans
+        leur audio ; les autres passent par le mode de décodage choisi puis
+        sont mis en cache. En séquentiel, un chunk en cache est rendu dès sa
+        lecture ; en lots ou en parallèle, il attend son tour dans `ready`.
+        """
+        ready = deque()   # chunks en cache en attente de leur tour
+
+        def fresh():
+            for chunk in source:
+                rec = cached.get(chunk.index)
+                if rec is None:
+                    yield chunk
+                else:
+                    ready.append((chunk._replace(data=None), rec["segments"]))
+
+        if self.batched and self.backend.supports_batching:
+            results = self._transcribe_batched(fresh())
+        elif self.workers > 1:
+            results = self._transcribe_parallel(fresh())
+        else:
+            results = self._transcribe_sequential(source, cached)
+
+        for chunk, segments in results:
+            while ready and ready[0][0].index < chunk.index:
+                yield ready.popleft()
+            if chunk.data is None:   # rendu depuis le cache (séquentiel)
+                yield chunk, segments
+                continue
+            segments = [{"start": float(seg["start"]), "end": float(seg["end"]),
+                         "text": seg["text"]} for seg in segments]
+            if self.cache is not None:
+                self.cache.append(self.cache_key, chunk, segments)
+            yield chunk, segments
+
+        if not self._abort:
+            yield from ready
+
+    def _resolve_language(self, model, audio) -> str:
+        """Détecte la langue une seule fois, sur le premier audio parlé."""
+        if self.language is None and VoiceActivityDetector().is_speech(audio):
+            self.language = self.backend.detect_language(model, audio)
+        return self.language
+
+    def _transcribe_sequential(self, source, cached=None):
+        """
+        Un chunk après l'autre sur le modèle courant ; produit (chunk, segments).
+        Les chunks présents dans `cached` sont rendus sans décodage ni audio.
+        """
+        # Le modèle CPU de secours n'est chargé qu'en cas d'erreur CUDA
+        cpu_model = None
+        use_cpu = False  # flag pour basculer définitivement
 
-                start, end = i * sz, min((i + 1) * sz, total)
-                chunk_data = audio[start:end]
-                self.audio_chunk.emit(chunk_data)
+        for chunk in source:
+            if self._abort:
+                break
+            rec = cached.get(chunk.index) if cached else None
+            if rec is not None:
+                yield chunk._replace(data=None), rec["segments"]
+                continue
 
-                # 2) Choisir le modèle actif
-                model = cpu_model if use_cpu else self.model
+            chunk_data = chunk.data
+            self.on_audio_chunk(chunk_data)
 
-                try:
-                    res = model.transcribe(
+            # Choisir le modèle actif
+            model = cpu_model if use_cpu else self.model
+
+            try:
+                res = self.backend.transcribe(
+                    model,
+                    chunk_data,
+                    language=self._resolve_language(model, chunk_data),
+                    beam_size=self.beam_size,
+                    best_of=self.best_of
+                )
+            except RuntimeError as e:
+                msg = str(e).lower()
+                if "illegal memory access" in msg or "cuda" in msg:
+                    # on passe en CPU pour la suite
+                    use_cpu = True
+                    # vider le cache sans risque de crash
+                    try:
+                        torch.cuda.empty_cache()
+                    except Exception:
+                        pass
+                    # et relancer immédiatement en CPU ; le modèle de secours
+                    # reste dans le registre pour les transcriptions suivantes
+                    cpu_model = self.backend.load(self.model_name, "cpu")
+                    res = self.backend.transcribe(
+                        cpu_model,
                         chunk_data,
-                        beam_size=self.beam_size,
-                        best_of=self.best_of,
+                        language=self._resolve_language(cpu_model, chunk_data),
+                        beam_size=1,
+                        best_of=1,
                         fp16=False
                     )
-                except RuntimeError as e:
-                    msg = str(e).lower()
-                    if "illegal memory access" in msg or "cuda" in msg:
-                        # on passe en CPU pour la suite
-                        use_cpu = True
-                        # vider le cache sans risque de crash
-                        try:
-                            torch.cuda.empty_cache()
-                        except Exception:
-                            pass
-                        # et relancer immédiatement en CPU
-                        res = cpu_model.transcribe(
-                            chunk_data,
-                            beam_size=1,
-                            best_of=1,
-                            fp16=False
+                else:
+                    # autre erreur -> on remonte
+                    raise
+
+            yield chunk, res["segments"]
+
+    def _transcribe_batched(self, source):
+        """
+        Fenêtres de 30 s de plusieurs chunks empilées en un seul passage de
+        l'encodeur et décodées en lot sur le GPU. Le décodage est glouton :
+        la recherche en faisceau de whisper.decode ne gère pas les lots. Les
+        fenêtres qui échouent aux seuils de whisper.transcribe (répétitions,
+        faible vraisemblance) sont re-décodées une à une par le moteur, avec
+        repli en température. En cas d'erreur CUDA, la suite est confiée au mode séquentiel (et à
+        son secours CPU).
+        """
+        model = self.model
+        sr, n_win = whisper.audio.SAMPLE_RATE, whisper.audio.N_SAMPLES
+        batch_size = self.batch_size or _auto_batch_size(model, beam_size=1)
+        tokenizer = options = None
+
+        pending, n_windows = [], 0   # chunks en attente de décodage
+        for chunk in source:
+            self._resolve_language(model, chunk.data)
+            pending.append(chunk)
+            n_windows += math.ceil(len(chunk.data) / n_win)
+            if n_windows < batch_size and not chunk.is_last:
+                continue
+            if self._abort:
+                return
+
+            if options is None or options.language != self.language:
+                tokenizer = whisper.tokenizer.get_tokenizer(
+                    model.is_multilingual, num_languages=model.num_languages,
+                    language=self.language, task="transcribe"
+                )
+                options = whisper.DecodingOptions(
+                    task="transcribe", language=self.language,
+                    fp16=uses_fp16(model), without_timestamps=False
+                )
+
+            # (chunk, début, fin) de chaque fenêtre de 30 s
+            flat = [(c, w, min(w + n_win, len(c.data)))
+                    for c in pending for w in range(0, len(c.data), n_win)]
+            try:
+                results = []
+                for b in range(0, len(flat), batch_size):
+                    mel = torch.stack([
+                        whisper.log_mel_spectrogram(
+                            whisper.pad_or_trim(c.data[w0:w1]),
+                            n_mels=model.dims.n_mels, device=model.device
                         )
-                    else:
-                        # autre erreur -> on remonte
-                        raise
-
-                # 3) Bufferisation comme avant
-                for seg in res["segments"]:
-                    for ph in self.splitter.split(seg["text"].strip()):
-                        if not ph:
-                            continue
-                        if len(self.buffer) == 0:
-                            self.buffer.append(ph.capitalize())
-                        else:
-                            self.buffer.append(ph)
-                        if len(self.buffer) >= self.spp:
-                            para = " ".join(self.buffer)
-                            self.segment.emit(para)
-                            self.buffer.clear()
-
-                self.progress.emit(i + 1, chunks)
-
-            # flush final
-            if self.buffer:
-                self.segment.emit(" ".join(self.buffer))
-                self.buffer.clear()
+                        for c, w0, w1 in flat[b:b + batch_size]
+                    ])
+                    results.extend(whisper.decode(model, mel, options))
+            except RuntimeError as e:
+                msg = str(e).lower()
+                if "illegal memory access" in msg or "cuda" in msg or "out of memory" in msg:
+                    try:
+                        torch.cuda.empty_cache()
+                    except Exception:
+                        pass
+                    yield from self._transcribe_sequential(itertools.chain(pending, source))
+                    return
+                raise
+
+            segments = {c.index: [] for c in pending}
+            for (c, w0, w1), r in zip(flat, results):
+                # Mêmes seuils que whisper.transcribe : silence, puis repli
+                if r.no_speech_prob > 0.6 and r.avg_logprob < -1.0:
+                    continue
+                if r.compression_ratio > 2.4 or r.avg_logprob < -1.0:
+                    res = self.backend.transcribe(
+                        model, c.data[w0:w1], language=self.language,
+                        beam_size=self.beam_size, best_of=self.best_of
+                    )
+                    segments[c.index].extend(
+                        {"start": w0 / sr + seg["start"], "end": w0 / sr + seg["end"],
+                         "text": seg["text"]}
+                        for seg in res["segments"]
+                    )
+                    continue
+                segments[c.index].extend(_segments_from_tokens(
+                    tokenizer, r.tokens, w0 / sr, (w1 - w0) / sr
+                ))
+            for c in pending:
+                self.on_audio_chunk(c.data)
+                yield c, segments[c.index]
+            pending, n_windows = [], 0
+
+    def _transcribe_parallel(self, source):
+        """
+        Chunks répartis sur un pool de processus (un modèle CPU par worker).
+        Au plus deux chunks en vol par worker ; les résultats sont rendus
+        dans l'ordre pour garder une émission incrémentale.
+        """
+        # Threads du processus courant (défaut de torch ou réglage Expert)
+        # partagés entre les workers
+        threads = (max(1, torch.get_num_threads() // self.workers)
+                   if isinstance(self.backend, WhisperBackend) else 0)
+        options = dict(beam_size=self.beam_size, best_of=self.best_of, fp16=False)
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_pool_init,
+            initargs=(self.backend, self.model_name, self.precision, threads)
+        )
+        in_flight = deque()   # (chunk, future) dans l'ordre de soumission
+        try:
+            while True:
+                for chunk in itertools.islice(source, 2 * self.workers - len(in_flight)):
+                    # Détection faite ici une fois, sur le modèle de l'interface
+                    options["language"] = self._resolve_language(self.model, chunk.data)
+                    in_flight.append((chunk, pool.submit(_pool_transcribe, chunk.data, options)))
+                if not in_flight or self._abort:
+                    break
 
-        except Exception:
+                chunk, future = in_flight.popleft()
+                self.on_audio_chunk(chunk.data)
+                yield chunk, future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _stitch(self, segments, offset: float, chunk_end: float, is_last: bool) -> list:
+        """
+        Textes à émettre pour un chunk. En mode recouvrement, la fin du chunk
+        est laissée au suivant (qui la décode avec plus de contexte), les
+        segments déjà couverts sont ignorés d'après leurs horodatages, et le
+        raccord est aligné mot à mot sur la fin déjà émise.
+        """
+        if self.overlap_s <= 0:
+            return [seg["text"] for seg in segments]
+
+        cut = chunk_end - self.overlap_s / 2
+        kept = []
+        for seg in segments:
+            seg_start, seg_end = offset + seg["start"], offset + seg["end"]
+            if seg_end <= self._emitted_until:
+                continue
+            if not is_last and seg_start >= cut:
+                break
+            kept.append((seg["text"].split(), seg_end))
+        if not kept:
+            return []
+
+        # Mots répétés de part et d'autre du raccord
+        if self._tail_words:
+            head = [_norm_word(w) for words, _ in kept for w in words]
+            k = suffix_prefix_overlap(self._tail_words, head[:len(self._tail_words)])
+            while k and kept:
+                words, seg_end = kept[0]
+                if len(words) <= k:
+                    k -= len(words)
+                    kept.pop(0)
+                else:
+                    kept[0] = (words[k:], seg_end)
+                    k = 0
+
+        texts = []
+        for words, seg_end in kept:
+            if not words:
+                continue
+            texts.append(" ".join(words))
+            self._tail_words.extend(_norm_word(w) for w in words)
+            self._emitted_until = max(self._emitted_until, seg_end)
+        del self._tail_words[:-self._tail_max]
+        return texts
+
+    def _push_text(self, text: str):
+        """Découpe en phrases et émet un paragraphe toutes les `spp` phrases."""
+        for ph in self.formatter.feed(text):
+            self._push_sentence(ph)
+
+    def _push_sentence(self, ph: str):
+        if not ph:
+            return
+        if len(self.buffer) == 0:
+            self.buffer.append(ph.capitalize())
+        else:
+            self.buffer.append(ph)
+        if len(self.buffer) >= self.spp:
+            para = " ".join(self.buffer)
+            self._emit(para)
+            self.buffer.clear()
+
+    def _emit(self, para: str):
+        self.paragraphs.append(para)
+        self.on_segment(para)
+
+    def stop(self):
+        """Demande l’arrêt coopératif (vérifié entre deux chunks)."""
+        self._abort = True
+
+
+class FileTranscribeThread(QThread):
+    """Exécute un FileTranscriber dans un thread Qt et relaie ses callbacks en signaux."""
+    progress     = Signal(int, int)    # (current_chunk, total_chunks)
+    segment      = Signal(str)         # paragraphes formatés
+    audio_chunk  = Signal(object)      # pour l'affichage du waveform
+    failed       = Signal(str)         # message d'erreur, émis avant done
+    done         = Signal()
+
+    def __init__(self, infile: str, model, model_name: str, **options):
+        super().__init__()
+        self.transcriber = FileTranscriber(
+            infile, model, model_name,
+            on_progress=self.progress.emit,
+            on_segment=self.segment.emit,
+            on_audio_chunk=self.audio_chunk.emit,
+            **options
+        )
+
+    def run(self):
+        try:
+            self.transcriber.run()
+        except Exception as e:
             print("Erreur dans FileTranscribeThread :")
             traceback.print_exc()
+            if self.transcriber.metrics is not None:
+                self.transcriber.metrics.errors += 1
+            self.failed.emit(str(e))
         finally:
             self.done.emit()
 
     def stop(self):
         """Demande l’arrêt coopératif du thread."""
-        self._abort = True
+        self.transcriber.stop()
+
+
+def write_txt(paragraphs, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for p in paragraphs:
+            f.write(p + "\n\n")
+
+def write_docx(paragraphs, path: str):
+    from docx import Document   # import différé : seulement pour l'export DOCX
+    doc = Document()
+    for p in paragraphs:
+        doc.add_paragraph(p)
+    doc.save(path)
+
+EXPORT_DURABILITY = ["paragraph", "interval", "close"]
+DOCX_SAVE_FACTOR = 20   # intervalle mini entre sauvegardes DOCX / durée d'une sauvegarde
+
+def recover_docx_journal(path: str):
+    """
+    Reconstitue un export DOCX interrompu à partir de son journal : le
+    dernier document sauvegardé plus les paragraphes journalisés, écrits
+    dans `<nom>.recovered.docx`. Retourne ce chemin, ou None.
+    """
+    journal = path + ".journal"
+    if not os.path.exists(journal):
+        return None
+    paragraphs = []
+    with open(journal, encoding="utf-8") as f:
+        for line in f:
+            try:
+                paragraphs.append(json.loads(line))
+            except ValueError:
+                break   # dernière ligne tronquée par l'arrêt brutal
+    recovered = None
+    if paragraphs:
+        from docx import Document
+        doc = Document(path) if os.path.exists(path) else Document()
+        for p in paragraphs:
+            doc.add_paragraph(p)
+        recovered = os.path.splitext(path)[0] + ".recovered.docx"
+        doc.save(recovered)
+    os.remove(journal)
+    return recovered
+
+def _fsync_dir(path: str):
+    """Rend durable un renommage dans `path` (sans effet là où c'est impossible)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return   # Windows : un dossier ne s'ouvre pas ainsi
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class ExportWriter:
+    """
+    Exports TXT/DOCX temps réel dans un thread dédié : l'appelant ne fait
+    que déposer le texte dans une file. Le thread écrit tout ce qui est en
+    attente en un seul lot, puis rend le fichier durable (fsync) selon la
+    politique : après chaque lot ("paragraph"), au plus toutes les
+    `interval_s` secondes ("interval") ou seulement à la fermeture ("close").
+
+    Le DOCX n'est pas réécrit à chaque paragraphe : les paragraphes vont
+    dans un journal annexe en ajout seul (`<docx>.journal`), et le document
+    complet n'est sauvegardé qu'après un délai d'au moins DOCX_SAVE_FACTOR
+    fois la durée de la sauvegarde précédente, ce qui garde un coût total
+    linéaire. Le journal est vidé à chaque sauvegarde et supprimé à la
+    fermeture. Sauf en politique "close", le document est rendu durable
+    (fsync du fichier et du dossier) avant que le journal ne soit vidé ;
+    après un échec (document ouvert dans Word, disque plein…), le délai
+    avant la tentative suivante double.
+    """
+
+    def __init__(self, durability: str = "interval", interval_s: float = 5.0,
+                 metrics: PipelineMetrics = None):
+        self.durability = durability
+        self.interval_s = interval_s
+        self.metrics = metrics
+        self.queue = queue.Queue()
+        self.txt_file = None
+        self.docx_doc = None
+        self.docx_path = None
+        self.journal = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._docx_dirty = False
+        self._docx_saved_at = time.monotonic()
+        self._docx_save_cost = 0.05
+        self._docx_failures = 0   # échecs de sauvegarde consécutifs
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def set_policy(self, durability: str, interval_s: float):
+        self.durability = durability
+        self.interval_s = interval_s
+
+    def set_txt(self, txt_file):
+        """Confie un fichier texte ouvert au thread (None : ferme l'actuel)."""
+        self.queue.put(("txt", txt_file))
+
+    def set_docx(self, doc, path: str = None):
+        """Confie un document DOCX au thread (None : sauvegarde et oublie l'actuel)."""
+        self.queue.put(("docx", (doc, path)))
+
+    def write(self, text: str):
+        """Ajoute un paragraphe ; ne bloque jamais."""
+        self.queue.put(("text", (text, time.time())))
+
+    def flush(self):
+        """Demande une écriture durable et une sauvegarde DOCX complète (asynchrone)."""
+        self.queue.put(("flush", None))
+
+    def close(self):
+        """Écrit ce qui reste, rend tout durable et arrête le thread."""
+        self.queue.put(("stop", None))
+        self.thread.join()
+
+    def _docx_delay(self) -> float:
+        delay = max(1.0, DOCX_SAVE_FACTOR * self._docx_save_cost)
+        return delay * 2 ** min(self._docx_failures, 6)
+
+    def _timeout(self):
+        """Temps avant la prochaine échéance (None : aucune)."""
+        now = time.monotonic()
+        deadlines = []
+        if self._dirty and self.durability == "interval":
+            deadlines.append(self._last_sync + self.interval_s)
+        if self._docx_dirty and self.durability != "close":
+            deadlines.append(self._docx_saved_at + self._docx_delay())
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def _run(self):
+        while True:
+            try:
+                commands = [self.queue.get(timeout=self._timeout())]
+            except queue.Empty:
+                commands = []
+            # Regroupe tout ce qui est déjà en attente
+            while True:
+                try:
+                    commands.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
 
+            texts = []
+            for kind, value in commands:
+                if kind == "text":
+                    texts.append(value)
+                    continue
+                self._write(texts)
+                texts = []
+                if kind == "txt":
+                    self._close_txt()
+                    self.txt_file = value
+                elif kind == "docx":
+                    self._close_docx()
+                    self._open_docx(*value)
+                elif kind == "flush":
+                    self._sync()
+                    self._save_docx()
+                elif kind == "stop":
+                    self._close_txt()
+                    self._close_docx()
+                    return
+            self._write(texts)
+
+            now = time.monotonic()
+            if self._dirty and (
+                self.durability == "paragraph"
+                or (self.durability == "interval" and now - self._last_sync >= self.interval_s)
+            ):
+                self._sync()
+            if (self._docx_dirty and self.durability != "close"
+                    and now - self._docx_saved_at >= self._docx_delay()):
+                self._save_docx()
+
+    def _write(self, items):
+        if not items:
+            return
+        texts = [text for text, _ in items]
+        if self.txt_file:
+            try:
+                self.txt_file.write("".join(t + "\n\n" for t in texts))
+            except Exception as e:
+                print(f"Error writing TXT: {e}")
+        if self.docx_doc:
+            for t in texts:
+                self.docx_doc.add_paragraph(t)
+            try:
+                self.journal.write("".join(json.dumps(t) + "\n" for t in texts))
+            except Exception as e:
+                print(f"Error writing DOCX journal: {e}")
+            self._docx_dirty = True
+        self._dirty = True
+        if self.metrics is not None:
+            now = time.time()
+            for _, queued_at in items:
+                self.metrics.record("export", now - queued_at)
+
+    def _sync(self):
+        for f in (self.txt_file, self.journal):
+            if not f:
+                continue
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception as e:
+                print(f"Error writing {f.name}: {e}")
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _open_docx(self, doc, path):
+        self.docx_doc, self.docx_path = doc, path
+        if doc is not None:
+            self.journal = open(path + ".journal", "w", encoding="utf-8")
+            # Le fichier sur disque sert de base au journal dès le départ
+            self._docx_dirty = True
+            self._save_docx()
+
+    def _save_docx(self):
+        """Sauvegarde complète (atomique) du DOCX, puis vidage du journal."""
+        if not self.docx_doc or not self._docx_dirty:
+            return
+        t0 = time.monotonic()
+        durable = self.durability != "close"
+        try:
+            with open(self.docx_path + ".tmp", "wb") as f:
+                self.docx_doc.save(f)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(self.docx_path + ".tmp", self.docx_path)
+            if durable:
+                _fsync_dir(os.path.dirname(os.path.abspath(self.docx_path)))
+        except Exception as e:
+            print(f"Error writing DOCX: {e}")
+            # Le journal reste intact ; nouvelle tentative après un délai croissant
+            self._docx_failures += 1
+            self._docx_saved_at = time.monotonic()
+            return
+        self._docx_failures = 0
+        self.journal.seek(0)
+        self.journal.truncate()
+        self._docx_saved_at = time.monotonic()
+        self._docx_save_cost = self._docx_saved_at - t0
+        self._docx_dirty = False
+
+    def _close_txt(self):
+        if self.txt_file:
+            self._sync()
+            self.txt_file.close()
+            self.txt_file = None
+
+    def _close_docx(self):
+        if self.docx_doc:
+            self._docx_dirty = True   # sauvegarde finale même sans nouveau texte
+            self._save_docx()
+            self.journal.close()
+            if not self._docx_dirty:
+                os.remove(self.journal.name)
+            self.journal = None
+            self.docx_doc = None
+
+class LevelMeter:
+    """
+    Niveaux RMS par barre publiés par le callback audio et lus par le GUI à
+    son propre rythme. Double tampon préalloué, sans verrou : l'écrivain
+    remplit le tampon inactif puis bascule l'index (affectation atomique),
+    le lecteur ne lit que le tampon actif.
+    """
+
+    def __init__(self, bars: int):
+        self.bars = bars
+        self._levels = np.zeros((2, bars), dtype=np.float32)
+        self._index = 0
+        self.seq = 0   # incrémenté à chaque publication
+
+    def publish(self, block):
+        """Calcule et publie les niveaux d'un bloc (sans allocation notable)."""
+        size = len(block) // self.bars
+        if size == 0:
+            return
+        back = 1 - self._index
+        frames = block[:size * self.bars].reshape(self.bars, size)
+        levels = self._levels[back]
+        np.einsum("ij,ij->i", frames, frames, out=levels)
+        levels /= size
+        np.sqrt(levels, out=levels)
+        self._index = back
+        self.seq += 1
+
+    def read(self):
+        """Retourne (seq, niveaux) ; les niveaux sont une copie."""
+        seq = self.seq
+        return seq, self._levels[self._index].copy()
 
 class WaveformWidget(QWidget):
-    def __init__(self):
+    BARS = 30
+
+    def __init__(self, fps: int = 33):
         super().__init__()
         self.setMinimumHeight(100)
-        self.waves = []
-        self.target_waves = []
-        self.animation_timer = QTimer()
+        self.waves = np.zeros(self.BARS)
+        self.target_waves = np.zeros(self.BARS)
+        self.phase = np.arange(self.BARS)
+        # Le timer ne tourne que pendant l'animation (et le retour au calme)
+        self.animation_timer = QTimer(self)
         self.animation_timer.timeout.connect(self.update_waves)
-        self.animation_timer.start(30)  # Faster updates for smoother animation
+        self.set_fps(fps)
         self.is_recording = False
         self.transition_speed = 0.15  # Controls how fast waves transition
+        self._gradients = {}
+        self._xs = np.zeros(self.BARS)
+        # Niveaux publiés par la source audio, relevés à chaque image
+        self.meter = LevelMeter(self.BARS)
+        self._seen = 0
+
+    def set_fps(self, fps: int):
+        self.animation_timer.setInterval(max(1, int(1000 / fps)))
 
     def start_animation(self):
         self.is_recording = True
-        self.waves = [0.1] * 30  # Start with small waves
+        self.waves = np.full(self.BARS, 0.1)  # Start with small waves
+        self.animation_timer.start()
 
     def stop_animation(self):
+        # Les barres retombent puis le timer s'arrête (voir update_waves)
         self.is_recording = False
-        self.target_waves = [0] * 30
+        self.target_waves = np.zeros(self.BARS)
 
     def update_audio_data(self, data):
-        if len(data) > 0:
-            normalized = np.abs(data) / np.max(np.abs(data) + 1e-10)
-            if self.is_recording:
-                # Create more varied wave heights with higher amplitude
-                chunk_size = max(1, len(normalized)//30)
-                self.target_waves = [
-                    # Increased amplitude
-                    normalized[i:i + chunk_size].mean() * 1.2
-                    for i in range(0, len(normalized), chunk_size)
-                ][:30]
-                # Add more randomness for dynamic look (±30% variation)
-                self.target_waves = [
-                    w * (1 + np.random.uniform(-0.3, 0.3)) for w in self.target_waves]
-            else:
-                self.target_waves = [0] * 30
-            self.update()
+        """Publie les niveaux d'un bloc audio (appelable depuis n'importe quel thread)."""
+        self.meter.publish(np.asarray(data, dtype=np.float32))
+
+    def _pull_levels(self):
+        """Relève les derniers niveaux publiés, s'il y en a de nouveaux."""
+        seq, levels = self.meter.read()
+        if seq == self._seen:
+            return
+        self._seen = seq
+        if self.is_recording:
+            normalized = levels / (levels.max() + 1e-10)
+            # Increased amplitude, with ±30% variation for a dynamic look
+            self.target_waves = normalized * 1.2 * (1 + np.random.uniform(-0.3, 0.3, self.BARS))
+        else:
+            self.target_waves = np.zeros(self.BARS)
 
     def update_waves(self):
-        if not self.waves:
-            self.waves = [0] * 30
-            self.target_waves = [0] * 30
+        self._pull_levels()
+        if self.is_recording:
+            t = time.time()
+            # Enhanced dynamic variation, additional wave motion
+            target = self.target_waves * (1 + np.sin(t * 6 + self.phase) * 0.15)
+            target *= 1 + np.cos(t * 4) * 0.1
+        else:
+            target = 0
 
-        # More responsive wave transitions
-        for i in range(len(self.waves)):
-            if self.is_recording:
-                # Enhanced dynamic variation
-                target = self.target_waves[i] * \
-                    (1 + np.sin(time.time() * 6 + i) * 0.15)
-                target *= 1 + np.cos(time.time() * 4) * \
-                    0.1  # Additional wave motion
-            else:
-                target = 0
+        # Faster transitions
+        self.waves += (target - self.waves) * 0.2
 
-            # Faster transitions
-            self.waves[i] += (target - self.waves[i]) * 0.2
+        # Au repos : plus rien ne bouge, on arrête le timer
+        if not self.is_recording and np.abs(self.waves).max() < 1e-3:
+            self.waves[:] = 0
+            self.animation_timer.stop()
 
         self.update()
 
+    def resizeEvent(self, event):
+        # Dégradés et positions ne dépendent que de la taille
+        width, height = self.width(), self.height()
+        self._xs = width * self.phase / self.BARS
+
+        # Green theme gradient
+        recording = QLinearGradient(0, 0, 0, height)
+        # Vibrant green colors during recording
+        recording.setColorAt(0, QColor(46, 204, 113))  # Bright green
+        recording.setColorAt(0.5, QColor(39, 174, 96))  # Medium green
+        recording.setColorAt(1, QColor(33, 150, 83))  # Dark green
+        idle = QLinearGradient(0, 0, 0, height)
+        # Subtle green when not recording
+        idle.setColorAt(0, QColor(46, 204, 113, 200))
+        idle.setColorAt(1, QColor(33, 150, 83, 200))
+        self._gradients = {True: recording, False: idle}
+        super().resizeEvent(event)
+
     def paintEvent(self, event):
-        if not self.waves:
+        if not self._gradients:
             return
 
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
 
         try:
-            width = self.width()
             height = self.height()
             center_y = height / 2
-            bar_width = width / (len(self.waves) * 1.5)
+            bar_width = self.width() / (self.BARS * 1.5)
             max_height = height * 0.85  # Slightly higher bars
+            radius = bar_width / 2
 
-            # Green theme gradient
-            gradient = QLinearGradient(0, 0, 0, height)
+            # Hauteurs de toutes les barres en une opération
+            t = time.time()
+            wave_effect = np.sin(t * 4 + self.phase * 0.5) * 0.08
+            heights = max_height * (self.waves + wave_effect)
             if self.is_recording:
-                # Vibrant green colors during recording
-                gradient.setColorAt(0, QColor(46, 204, 113))  # Bright green
-                gradient.setColorAt(0.5, QColor(39, 174, 96))  # Medium green
-                gradient.setColorAt(1, QColor(33, 150, 83))  # Dark green
-            else:
-                # Subtle green when not recording
-                gradient.setColorAt(0, QColor(46, 204, 113, 200))
-                gradient.setColorAt(1, QColor(33, 150, 83, 200))
-
-            painter.setPen(Qt.NoPen)
-            painter.setBrush(gradient)
-
-            for i, amplitude in enumerate(self.waves):
-                x = width * i / len(self.waves)
-
-                # Enhanced wave motion
-                wave_effect = np.sin(time.time() * 4 + i * 0.5) * 0.08
-                bar_height = max_height * (amplitude + wave_effect)
-
-                if self.is_recording:
-                    # Enhanced pulsing effect
-                    pulse = 1 + np.sin(time.time() * 5) * 0.08
-                    bar_height *= pulse
-
-                rect = QRectF(
-                    x + bar_width/2,
-                    center_y - bar_height/2,
-                    bar_width,
-                    bar_height
-                )
-
+                # Enhanced pulsing effect
+                heights *= 1 + np.sin(t * 5) * 0.08
+
+            bars = QPainterPath()
+            glow = QPainterPath()
+            for x, bar_height, amplitude in zip(self._xs.tolist(), heights.tolist(),
+                                                self.waves.tolist()):
+                rect = QRectF(x + radius, center_y - bar_height / 2, bar_width, bar_height)
+                bars.addRoundedRect(rect, radius, radius)
                 # Green glow effect when recording
                 if self.is_recording and amplitude > 0.1:
-                    glow = QPainterPath()
-                    glow.addRoundedRect(rect, bar_width/2, bar_width/2)
-                    painter.fillPath(glow, QColor(46, 204, 113, 40))
+                    glow.addRoundedRect(rect, radius, radius)
 
-                painter.drawRoundedRect(rect, bar_width/2, bar_width/2)
+            if not glow.isEmpty():
+                painter.fillPath(glow, QColor(46, 204, 113, 40))
+            painter.fillPath(bars, self._gradients[self.is_recording])
 
         finally:
             painter.end()
 
+class FileHashThread(QThread):
+    """
+    Empreinte d'un fichier ouvert et point de reprise éventuel, hors du
+    thread GUI : un gros fichier, ou un fichier réseau, se lit lentement.
+    """
+    hashed = Signal(str, str, object)   # (chemin, empreinte, point de reprise ou None)
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            audio_hash = file_content_hash(self.path, should_stop=self.isInterruptionRequested)
+        except OSError:
+            traceback.print_exc()
+            return
+        if audio_hash is not None:
+            self.hashed.emit(self.path, audio_hash, CheckpointStore().load(audio_hash))
+
+class StartupThread(QThread):
+    """Imports lourds (torch, whisper) et sondage CUDA, hors du thread GUI."""
+    ready = Signal(bool)      # CUDA disponible
+    error = Signal(Exception)
+
+    def __init__(self, import_whisper: bool = True):
+        super().__init__()
+        self.import_whisper = import_whisper
+
+    def run(self):
+        try:
+            if not self.import_whisper:
+                self.ready.emit(False)
+                return
+            whisper._lazy_import()
+            self.ready.emit(torch.cuda.is_available())
+        except Exception as e:
+            self.error.emit(e)
+
 class ModelLoaderThread(QThread):
-    loaded = Signal(object)   # émet le modèle une fois prêt
-    error  = Signal(Exception)
+    loaded  = Signal(object)   # émet le modèle une fois prêt
+    warming = Signal()         # modèle chargé, préchauffage en cours
+    error   = Signal(Exception)
 
-    def __init__(self, model_name, device_str):
+    def __init__(self, model_name, device_str, precision="fp32", backend=None,
+                 threads=(0, 0), compile=False):
         super().__init__()
         self.model_name = model_name
         self.device_str = device_str
+        self.precision  = precision
+        self.backend    = backend or WhisperBackend()
+        self.threads    = threads    # (intra-op, inter-op), 0 = automatique
+        self.compile    = compile
+        self.warmup_s   = 0.0        # durée du préchauffage, relevée par le GUI
 
     def run(self):
         try:
-            dev = torch.device("cuda" if self.device_str == "GPU" else "cpu")
-            model = whisper.load_model(self.model_name, device=dev)
+            dev = "cuda" if self.device_str == "GPU" else "cpu"
+            torch_backend = isinstance(self.backend, WhisperBackend)
+            if torch_backend:
+                apply_cpu_threads(*self.threads)
+            # Chargement puis conversion (fp16 / int8) faits par le registre
+            model = self.backend.load(self.model_name, dev, self.precision)
+            if torch_backend:
+                compile_encoder(model, self.compile)
+
+            # Le premier décodage est bien plus lent que les suivants : on le
+            # fait ici plutôt qu'au premier appui sur "Start recording"
+            self.warming.emit()
+            t0 = time.perf_counter()
+            try:
+                self.backend.warmup(model)
+            except Exception:
+                if not (torch_backend and self.compile):
+                    raise
+                print("torch.compile failed, using the eager encoder")
+                traceback.print_exc()
+                compile_encoder(model, False)
+                self.backend.warmup(model)
+            self.warmup_s = time.perf_counter() - t0
             self.loaded.emit(model)
         except Exception as e:
             self.error.emit(e)
 
 class WhisperGUI(QMainWindow):
-    update_text = Signal(str)
+    update_text = Signal(str, str, float)  # (committed, tentative, captured_at)
     add_newline = Signal()
 
     def __init__(self):
@@ -293,11 +2238,29 @@ class WhisperGUI(QMainWindow):
         self.history_text = []  # Array to store history
         self.current_segment_start = None  # Track start time of current segment
         self.loaded_file_path = None
+        self.loaded_file_hash = None   # empreinte calculée par FileHashThread
+        self.hash_threads = []
+        self.resume_checkpoint = None
+        self.shown_history = 0  # Entries of history_text already in the display
+        self.live_formatter = TranscriptFormatter()  # Committed text of the current segment
+        self.live_committed = ""
+        self.live_lines = []
+        self.tail_start = 0  # Document position where the tentative block starts
         self.transcribing_file = False
+        self.file_error = None   # erreur de la dernière transcription de fichier
         
-        # Fichiers ouverts pour écriture temps réel
-        self.txt_file = None
-        self.docx_doc = None
+        # Mesures de démarrage (s depuis l'import du module) ; --measure-startup
+        # quitte l'application une fois le modèle prêt
+        self.startup = {}
+        self.exit_when_ready = False
+        # Réglages conservés d'une session à l'autre
+        self.settings = QSettings("whisper-realtime-gui", "whisper_gui")
+        # Moteur de transcription (WHISPER_GUI_BACKEND=fake : moteur factice)
+        self.backend = get_backend()
+        # Instrumentation du pipeline, affichée dans la barre d'état
+        self.metrics = PipelineMetrics()
+        # Écritures temps réel, faites hors des threads GUI et de décodage
+        self.export_writer = ExportWriter(metrics=self.metrics)
         
         # Show startup message
         self.statusBar().showMessage("Application is starting...")
@@ -306,10 +2269,14 @@ class WhisperGUI(QMainWindow):
         self.progress_bar.setMaximum(0)     # 0,0 pour mode indéterminé
         self.progress_bar.setVisible(False) # cachée par défaut
         self.statusBar().addPermanentWidget(self.progress_bar)
+        self.lbl_metrics = QLabel()
+        self.statusBar().addPermanentWidget(self.lbl_metrics)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self._refresh_metrics)
+        self.metrics_timer.start(1000)
         
         self.init_ui()
         self.init_whisper()
-        self.last_buffer_reset = time.time()
         self.update_text.connect(self.update_display)
         self.add_newline.connect(self._add_newline)
 
@@ -330,12 +2297,9 @@ class WhisperGUI(QMainWindow):
 
         device_label = QLabel(self.tr("Device:"))
         self.device_combo = QComboBox()
-        # si CUDA dispo, propose GPU, sinon juste CPU
-        devices = (["GPU"] if torch.cuda.is_available() else []) + ["CPU"]
-        self.device_combo.addItems(devices)
-        if torch.cuda.is_available():
-            # force la sélection de GPU par défaut
-            self.device_combo.setCurrentText("GPU")
+        # CPU en attendant le sondage CUDA fait au démarrage (on_startup_ready)
+        self.device_combo.addItems(["CPU"])
+        self.device_combo.currentTextChanged.connect(self.load_model)
         controls_layout.addWidget(device_label)
         controls_layout.addWidget(self.device_combo)
 
@@ -357,6 +2321,8 @@ class WhisperGUI(QMainWindow):
         # Text display
         self.text_display = QTextEdit()
         self.text_display.setReadOnly(True)
+        # Document en ajout seul : pas de pile d'annulation qui grossit
+        self.text_display.setUndoRedoEnabled(False)
         # Set dark theme
         self.text_display.setStyleSheet(
             "QTextEdit { background-color: #2b2b2b; color: white; }")
@@ -405,6 +2371,105 @@ class WhisperGUI(QMainWindow):
         self.spn_best.setValue(5)
         form_exp.addRow(self.tr("Best of"), self.spn_best)
 
+        self.spn_overlap = QSpinBox()
+        self.spn_overlap.setRange(0, 30)
+        self.spn_overlap.setValue(0)
+        form_exp.addRow(self.tr("Overlap (s)"), self.spn_overlap)
+
+        self.cmb_language = QComboBox()
+        # Langues ajoutées une fois whisper importé (on_startup_ready)
+        self.cmb_language.addItem(self.tr("Auto (detect once)"), None)
+        form_exp.addRow(self.tr("Language"), self.cmb_language)
+
+        self.cmb_precision = QComboBox()
+        self.cmb_precision.addItems(PRECISIONS)
+        self.cmb_precision.currentTextChanged.connect(self.load_model)
+        form_exp.addRow(self.tr("Precision"), self.cmb_precision)
+
+        self.spn_cache = QSpinBox()
+        self.spn_cache.setRange(256, 65536)
+        self.spn_cache.setSingleStep(256)
+        self.spn_cache.setValue(MODEL_REGISTRY.budget_mb)
+        self.spn_cache.valueChanged.connect(MODEL_REGISTRY.set_budget)
+        form_exp.addRow(self.tr("Model cache (MB)"), self.spn_cache)
+
+        self.spn_workers = QSpinBox()
+        self.spn_workers.setRange(1, os.cpu_count() or 1)
+        self.spn_workers.setValue(1)
+        form_exp.addRow(self.tr("Parallel workers (CPU)"), self.spn_workers)
+
+        # Threads CPU de torch, 0 = automatique
+        self.spn_threads = QSpinBox()
+        self.spn_threads.setRange(0, os.cpu_count() or 1)
+        self.spn_threads.setSpecialValueText(self.tr("Auto"))
+        self.spn_threads.setValue(0)
+        self.spn_threads.valueChanged.connect(self._apply_threads)
+        form_exp.addRow(self.tr("Intra-op threads"), self.spn_threads)
+
+        self.spn_interop = QSpinBox()
+        self.spn_interop.setRange(0, os.cpu_count() or 1)
+        self.spn_interop.setSpecialValueText(self.tr("Auto"))
+        # Fixé avant le premier modèle seulement : la valeur est conservée
+        # et appliquée au démarrage suivant
+        self.spn_interop.setValue(int(self.settings.value("interop_threads", 0)))
+        self.spn_interop.setToolTip(self.tr("Saved; once a model has run, applies at next start"))
+        self.spn_interop.valueChanged.connect(
+            lambda value: self.settings.setValue("interop_threads", value))
+        self.spn_interop.valueChanged.connect(self._apply_threads)
+        form_exp.addRow(self.tr("Inter-op threads"), self.spn_interop)
+
+        self.chk_compile = QCheckBox(self.tr("Compile encoder (torch.compile)"))
+        self.chk_compile.setChecked(False)
+        self.chk_compile.toggled.connect(self.load_model)
+        form_exp.addRow(self.chk_compile)
+
+        self.chk_batched = QCheckBox(self.tr("Batched decoding (GPU)"))
+        self.chk_batched.setChecked(False)
+        # Le décodage par lots est glouton : faisceau et best-of sans effet
+        self.chk_batched.toggled.connect(self._update_decode_controls)
+        self.device_combo.currentTextChanged.connect(self._update_decode_controls)
+        form_exp.addRow(self.chk_batched)
+
+        self.chk_cache = QCheckBox(self.tr("Reuse cached transcripts"))
+        self.chk_cache.setChecked(True)
+        form_exp.addRow(self.chk_cache)
+
+        self.spn_pause = QSpinBox()
+        self.spn_pause.setRange(200, 3000)
+        self.spn_pause.setSingleStep(100)
+        self.spn_pause.setValue(700)
+        form_exp.addRow(self.tr("Silence pause (ms)"), self.spn_pause)
+
+        self.spn_vad = QSpinBox()
+        self.spn_vad.setRange(3, 30)
+        self.spn_vad.setValue(9)
+        form_exp.addRow(self.tr("VAD threshold (dB)"), self.spn_vad)
+
+        self.spn_lag = QSpinBox()
+        self.spn_lag.setRange(1, 30)
+        self.spn_lag.setValue(5)
+        form_exp.addRow(self.tr("Max lag (s)"), self.spn_lag)
+
+        self.cmb_durability = QComboBox()
+        self.cmb_durability.addItem(self.tr("Every paragraph"), "paragraph")
+        self.cmb_durability.addItem(self.tr("Every N seconds"), "interval")
+        self.cmb_durability.addItem(self.tr("On close"), "close")
+        self.cmb_durability.setCurrentIndex(1)
+        self.cmb_durability.currentIndexChanged.connect(self._apply_export_policy)
+        form_exp.addRow(self.tr("Export sync"), self.cmb_durability)
+
+        self.spn_sync = QSpinBox()
+        self.spn_sync.setRange(1, 300)
+        self.spn_sync.setValue(5)
+        self.spn_sync.valueChanged.connect(self._apply_export_policy)
+        form_exp.addRow(self.tr("Sync interval (s)"), self.spn_sync)
+
+        self.spn_fps = QSpinBox()
+        self.spn_fps.setRange(5, 60)
+        self.spn_fps.setValue(33)
+        self.spn_fps.valueChanged.connect(self.waveform.set_fps)
+        form_exp.addRow(self.tr("Waveform FPS"), self.spn_fps)
+
         self.grp_exp.setLayout(form_exp)
         main_layout.addWidget(self.grp_exp)
 
@@ -434,6 +2499,17 @@ class WhisperGUI(QMainWindow):
         form_export.addRow(self.chk_save_docx,
                            self._hbox(self.le_docx_path, self.btn_docx_browse))
 
+        # Métriques du pipeline (JSON-lines)
+        self.chk_metrics = QCheckBox(self.tr("Write metrics (JSONL)"))
+        self.chk_metrics.toggled.connect(self.toggle_metrics_file)
+        self.le_metrics_path = QLineEdit("metrics.jsonl")
+        self.btn_metrics_browse = QPushButton("…")
+        self.btn_metrics_browse.clicked.connect(
+            lambda: self._browse(self.le_metrics_path, save=True, filt="*.jsonl")
+        )
+        form_export.addRow(self.chk_metrics,
+                           self._hbox(self.le_metrics_path, self.btn_metrics_browse))
+
         grp_export.setLayout(form_export)
         main_layout.addWidget(grp_export)
 
@@ -457,56 +2533,101 @@ class WhisperGUI(QMainWindow):
         # Si vous voulez que la fenêtre redimensionne automatiquement :
         QTimer.singleShot(0, self.adjustSize)
 
+    def toggle_metrics_file(self, checked):
+        """Active/désactive l'écriture des métriques en JSON-lines"""
+        if checked:
+            try:
+                self.metrics.open(self.le_metrics_path.text())
+            except Exception as e:
+                QMessageBox.critical(self, self.tr("Error"), f"Unable to open file: {e}")
+                self.chk_metrics.setChecked(False)
+        else:
+            self.metrics.close()
+
+    def _refresh_metrics(self):
+        """Résumé des métriques dans la barre d'état, et instantané JSONL."""
+        if not (self.recording or self.transcribing_file):
+            return
+        m = self.metrics
+        if self.recording:
+            m.gauge("queue_depth", self.live.audio_queue.qsize())
+            m.gauge("dropped_blocks", self.live.dropped_blocks)
+            m.gauge("queued_s", self.live.queued_samples / self.sample_rate)
+            m.gauge("dropped_s", self.live.dropped_samples / self.sample_rate)
+        m.write(mode="live" if self.recording else "file")
+
+        parts = []
+        for stage in ("decode", "display"):
+            p = m.percentiles(stage)
+            if p:
+                parts.append(self.tr("{stage} p50/p95 {p50:.2f}/{p95:.2f} s").format(
+                    stage=stage, p50=p[0], p95=p[1]))
+        parts.append(self.tr("RTF {rtf:.2f}").format(rtf=m.rtf))
+        if self.recording:
+            parts.append(self.tr(
+                "queue {depth} — {queued:.0f} s received, dropped {blocks} blocks / {seconds:.1f} s"
+            ).format(
+                depth=m.gauges["queue_depth"], queued=m.gauges["queued_s"],
+                blocks=m.gauges["dropped_blocks"], seconds=m.gauges["dropped_s"]))
+        if m.errors:
+            parts.append(self.tr("{errors} errors").format(errors=m.errors))
+        self.lbl_metrics.setText(" · ".join(parts))
+
+    def _update_decode_controls(self):
+        batched = self.chk_batched.isChecked() and self.device_combo.currentText() == "GPU"
+        self.spn_beam.setEnabled(not batched)
+        self.spn_best.setEnabled(not batched)
+
+    def _apply_threads(self):
+        # Avant le premier modèle, torch n'est pas encore importé : le
+        # ModelLoaderThread appliquera les réglages
+        if self.model is not None and isinstance(self.backend, WhisperBackend):
+            if not apply_cpu_threads(self.spn_threads.value(), self.spn_interop.value()):
+                self.statusBar().showMessage(
+                    self.tr("Inter-op threads will apply at next start."), 5000)
+
+    def _apply_export_policy(self):
+        self.export_writer.set_policy(self.cmb_durability.currentData(), self.spn_sync.value())
+
     def toggle_txt_realtime(self, checked):
         """Active/désactive l'écriture temps réel en TXT"""
         if checked:
             try:
-                self.txt_file = open(self.le_txt_path.text(), "w", encoding="utf-8")
+                self.export_writer.set_txt(open(self.le_txt_path.text(), "w", encoding="utf-8"))
                 self.statusBar().showMessage(self.tr("Real-time TXT writing enabled"), 2000)
             except Exception as e:
                 QMessageBox.critical(self, self.tr("Error TXT"), f"Unable to open file: {e}")
                 self.chk_save_txt.setChecked(False)
         else:
-            if hasattr(self, 'txt_file') and self.txt_file:
-                self.txt_file.close()
-                self.txt_file = None
-                self.statusBar().showMessage(self.tr("Real-time TXT writing disabled"), 2000)
+            self.export_writer.set_txt(None)
+            self.statusBar().showMessage(self.tr("Real-time TXT writing disabled"), 2000)
 
     def toggle_docx_realtime(self, checked):
         """Active/désactive l'écriture temps réel en DOCX"""
         if checked:
             try:
-                self.docx_doc = Document()
+                from docx import Document   # chargé seulement si l'export DOCX est activé
+                path = self.le_docx_path.text()
+                # Export précédent interrompu : on reconstitue ce qui manquait
+                recovered = recover_docx_journal(path)
+                if recovered:
+                    QMessageBox.information(
+                        self, self.tr("DOCX recovered"),
+                        self.tr("An interrupted DOCX export was recovered to {path}").format(path=recovered)
+                    )
+                self.export_writer.set_docx(Document(), path)
                 self.statusBar().showMessage(self.tr("Real-time DOCX writing enabled"), 2000)
             except Exception as e:
                 QMessageBox.critical(self, self.tr("Error DOCX"), f"Error initialization: {e}")
                 self.chk_save_docx.setChecked(False)
         else:
-            if hasattr(self, 'docx_doc') and self.docx_doc:
-                try:
-                    self.docx_doc.save(self.le_docx_path.text())
-                    self.statusBar().showMessage(self.tr("Document DOCX saved"), 2000)
-                except Exception as e:
-                    QMessageBox.warning(self, self.tr("Warning"), f"Error saving DOCX: {e}")
-                self.docx_doc = None
+            # Sauvegarde finale faite par le thread d'écriture
+            self.export_writer.set_docx(None)
+            self.statusBar().showMessage(self.tr("Document DOCX saved"), 2000)
 
     def write_realtime(self, text):
-        """Écrit le texte en temps réel dans les fichiers activés"""
-        if self.txt_file:
-            try:
-                self.txt_file.write(text + "\n\n")
-                self.txt_file.flush()  # Force l'écriture immédiate
-                os.fsync(self.txt_file.fileno())
-            except Exception as e:
-                print(f"Error writing TXT: {e}")
-
-        if self.docx_doc:
-            try:
-                self.docx_doc.add_paragraph(text)
-                # Sauvegarde périodique du DOCX
-                self.docx_doc.save(self.le_docx_path.text())
-            except Exception as e:
-                print(f"Error writing DOCX: {e}")
+        """Dépose le texte pour les fichiers activés (ne bloque jamais)."""
+        self.export_writer.write(text)
 
     def _hbox(self, widget, button):
         hb = QHBoxLayout()
@@ -537,9 +2658,7 @@ class WhisperGUI(QMainWindow):
         # TXT
         if not self.chk_save_txt.isChecked():  # Seulement si pas en temps réel
             try:
-                with open(self.le_txt_path.text(), "w", encoding="utf-8") as f:
-                    for p in paras:
-                        f.write(p + "\n\n")
+                write_txt(paras, self.le_txt_path.text())
                 saved_files.append("TXT")
             except Exception as e:
                 QMessageBox.critical(self, self.tr("Error TXT"), str(e))
@@ -548,10 +2667,7 @@ class WhisperGUI(QMainWindow):
         # DOCX
         if not self.chk_save_docx.isChecked():  # Seulement si pas en temps réel
             try:
-                doc = Document()
-                for p in paras:
-                    doc.add_paragraph(p)
-                doc.save(self.le_docx_path.text())
+                write_docx(paras, self.le_docx_path.text())
                 saved_files.append("DOCX")
             except Exception as e:
                 QMessageBox.critical(self, self.tr("Error DOCX"), str(e))
@@ -566,29 +2682,92 @@ class WhisperGUI(QMainWindow):
 
     def init_whisper(self):
         self.recording = False
-        self.audio_queue = queue.Queue()
         self.sample_rate = 16000
         self.channels = 1
         self.blocksize = int(self.sample_rate * 0.3)  # 0.3 giây mỗi chunk
         self.model = None
         self.process_thread = None
+        self.live = None  # pipeline micro de la session en cours
         self.stable_tokens = None
         self.unstable_tokens = None
         self.eos_token = None
-        self.device = torch.device(
-            'mps' if torch.backends.mps.is_available() else 'cpu')
-        # Load model ngay khi khởi tạo
+
+        # Fenêtre affichée tout de suite, en préchauffage : imports lourds et
+        # sondage CUDA en arrière-plan, puis chargement du modèle
+        self.model_combo.setEnabled(False)
+        self.device_combo.setEnabled(False)
+        self.cmb_precision.setEnabled(False)
+        self.chk_compile.setEnabled(False)
+        self.record_button.setEnabled(False)
+        self.open_file_button.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage(self.tr("Warming up…"))
+        self.startup_thread = StartupThread(isinstance(self.backend, WhisperBackend))
+        self.startup_thread.ready.connect(self.on_startup_ready)
+        self.startup_thread.error.connect(self.on_model_error)
+        self.startup_thread.start()
+
+    @Slot(bool)
+    def on_startup_ready(self, cuda: bool):
+        """Bibliothèques importées : on complète les listes puis on charge le modèle."""
+        if cuda:
+            self.device_combo.blockSignals(True)
+            # si CUDA dispo, propose GPU et le sélectionne par défaut
+            self.device_combo.insertItem(0, "GPU")
+            self.device_combo.setCurrentText("GPU")
+            self.device_combo.blockSignals(False)
+        if isinstance(self.backend, WhisperBackend):
+            for code, name in sorted(whisper.tokenizer.LANGUAGES.items(), key=lambda kv: kv[1]):
+                self.cmb_language.addItem(f"{name.title()} ({code})", code)
         self.load_model()
 
+    def mark_window_visible(self):
+        """Appelé au premier tour de boucle d'événements après show()."""
+        self.startup["window_visible_s"] = time.perf_counter() - _T_START
+        print(f"Startup: window visible after {self.startup['window_visible_s']:.2f} s")
+
     def open_audio_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, self.tr("Select an audio file"), "", "Audio (*.mp3 *.wav *.m4a *.ogg)"
+            self, self.tr("Select an audio file"), "",
+            "Audio ({})".format(" ".join("*" + ext for ext in AUDIO_EXTENSIONS))
         )
         if file_path:
             self.loaded_file_path = file_path
+            self.loaded_file_hash = None
+            self.resume_checkpoint = None
             self.statusBar().showMessage(
                 self.tr("File loaded: {file_path}").format(file_path=file_path), 5000
             )
+            # Empreinte calculée en arrière-plan, puis transmise au FileTranscriber
+            self.hash_threads = [t for t in self.hash_threads if t.isRunning()]
+            thread = FileHashThread(file_path)
+            thread.hashed.connect(self._on_file_hashed)
+            thread.start()
+            self.hash_threads.append(thread)
+
+    @Slot(str, str, object)
+    def _on_file_hashed(self, file_path: str, audio_hash: str, state):
+        if file_path != self.loaded_file_path:
+            return   # un autre fichier a été ouvert entre-temps
+        self.loaded_file_hash = audio_hash
+        if not self.transcribing_file:
+            self.resume_checkpoint = self._ask_resume(state)
+
+    def _ask_resume(self, state):
+        """Propose de reprendre une transcription interrompue de ce fichier."""
+        if not state:
+            return None
+        params = state.get("params", {})
+        if (params.get("model") != self.current_model_name
+                or params.get("precision") != self.cmb_precision.currentText()):
+            return None
+        answer = QMessageBox.question(
+            self, self.tr("Resume"),
+            self.tr("An interrupted transcription of this file was found "
+                    "({seconds:.0f} s done). Resume it?").format(
+                seconds=state.get("audio_seconds", 0))
+        )
+        return state if answer == QMessageBox.Yes else None
 
     @Slot(int, int)
     def _on_file_progress(self, current, total):
@@ -625,9 +2804,16 @@ class WhisperGUI(QMainWindow):
         self.progress_bar.setMaximum(0)  # Mode indéterminé
         self.model_combo.setEnabled(False)
         self.device_combo.setEnabled(False)
+        self.cmb_precision.setEnabled(False)
+        self.chk_compile.setEnabled(False)
 
         # Lance le thread
-        self.loader = ModelLoaderThread(model_name, device_str)
+        self.loader = ModelLoaderThread(model_name, device_str, self.cmb_precision.currentText(),
+                                        self.backend,
+                                        (self.spn_threads.value(), self.spn_interop.value()),
+                                        self.chk_compile.isChecked())
+        self.loader.warming.connect(
+            lambda: self.statusBar().showMessage(self.tr("Warming up model…")))
         self.loader.loaded.connect(self.on_model_loaded)
         self.loader.error.connect(self.on_model_error)
         self.loader.start()
@@ -640,6 +2826,21 @@ class WhisperGUI(QMainWindow):
         self.progress_bar.setVisible(False)
         self.model_combo.setEnabled(True)
         self.device_combo.setEnabled(True)
+        self.cmb_precision.setEnabled(True)
+        self.chk_compile.setEnabled(True)
+        self.record_button.setEnabled(True)
+        self.open_file_button.setEnabled(True)
+        self.metrics.gauge("warmup_s", self.loader.warmup_s)
+
+        # Premier modèle prêt : fin du démarrage
+        if "model_ready_s" not in self.startup:
+            self.startup["model_ready_s"] = time.perf_counter() - _T_START
+            print(f"Startup: model ready after {self.startup['model_ready_s']:.2f} s")
+            for name, value in self.startup.items():
+                self.metrics.gauge("startup_" + name, value)
+            if self.exit_when_ready:
+                print(json.dumps(self.startup))
+                QApplication.quit()
 
         # Réinitialisation éventuelle des tokens
         self.stable_tokens = None
@@ -656,76 +2857,31 @@ class WhisperGUI(QMainWindow):
         self.progress_bar.setVisible(False)
         self.model_combo.setEnabled(True)
         self.device_combo.setEnabled(True)
+        self.cmb_precision.setEnabled(True)
+        self.chk_compile.setEnabled(True)
     
-    def process_audio(self):
-        """Process audio data from the queue"""
-        if self.model is None:
-            print(self.tr("Model not loaded. Please load the model first."))
+    def _on_live_segment(self, text: str, start_ts: float, end_ts: float):
+        """Segment clos par le pipeline micro (thread de traitement)."""
+        self.current_transcription = text
+        self.current_segment_start = start_ts
+        self._finalize_segment(end_ts)
+        self.add_newline.emit()
+
+    def _finalize_segment(self, end_ts: float):
+        """Passe le segment courant dans l'historique, horodaté."""
+        if not self.current_transcription.strip():
             return
+        end_time = datetime.fromtimestamp(end_ts)
+        start_time = datetime.fromtimestamp(self.current_segment_start or end_ts)
+        timestamp = f"[{start_time.strftime('%H:%M:%S')}-{end_time.strftime('%H:%M:%S')}]"
 
-        audio_buffer = np.array([], dtype=np.float32)
-        try:
-            while self.recording:
-                # Get audio data from queue
-                if self.audio_queue.empty():
-                    time.sleep(0.1)
-                    continue
-
-                # Lấy audio data mới và thêm vào buffer
-                audio_data = self.audio_queue.get()
-                audio_data = audio_data.flatten().astype(np.float32)
-                audio_buffer = np.concatenate([audio_buffer, audio_data])
-
-                # Giới hạn độ dài buffer để tránh quá tải
-                max_buffer_size = self.sample_rate * 15  # 15 giây
-                current_time = time.time()
-                buffer_reset_time = 15
-                # Reset buffer sau mỗi 15 giây
-                if current_time - self.last_buffer_reset > buffer_reset_time:
-                    # Save current transcription to history before reset
-                    if self.current_transcription.strip():
-                        # Format timestamps
-                        end_time = datetime.fromtimestamp(current_time)
-                        start_time = datetime.fromtimestamp(
-                            self.current_segment_start or (current_time - buffer_reset_time))
-                        timestamp = f"[{start_time.strftime('%H:%M:%S')}-{end_time.strftime('%H:%M:%S')}]"
-
-                        # Add to history with timestamp
-                        final_text = f"{timestamp} {self.current_transcription.strip()}"
-                        self.history_text.append(final_text)
-                        
-                        # Écriture temps réel
-                        self.write_realtime(final_text)
-
-                    self.current_transcription = ""
-                    self.current_segment_start = current_time  # Set start time for new segment
-                    self.last_buffer_reset = current_time
-                    self.add_newline.emit()  # Emit signal instead of direct modification
-                    audio_buffer = audio_data  # Reset buffer
-                elif len(audio_buffer) > max_buffer_size:
-                    audio_buffer = audio_buffer[-max_buffer_size:]
-
-                try:
-                    # Transcription simplifiée avec OpenAI Whisper officiel
-                    result = self.model.transcribe(
-                        audio_buffer,
-                        fp16=False
-                    )
-
-                    transcription = result["text"]
-
-                    # Update the display with new text
-                    self.current_transcription = transcription
-                    self.update_text.emit(transcription)
-
-                except Exception as e:
-                    print(self.tr("Error in transcription: {str(e)}"))
-                    traceback.print_exc()
-                    continue
+        final_text = f"{timestamp} {self.current_transcription.strip()}"
+        self.history_text.append(final_text)
+        self.current_transcription = ""
+        self.current_segment_start = None
 
-        except Exception as e:
-            print(self.tr("Error in process_audio: {str(e)}"))
-            traceback.print_exc()
+        # Écriture temps réel
+        self.write_realtime(final_text)
 
     def toggle_recording(self):
         # 1) si on transcrit un fichier → on demande l’arrêt coopératif et on restaure immédiatement l’UI
@@ -752,8 +2908,14 @@ class WhisperGUI(QMainWindow):
         else:
             self.start_recording()
 
+    @Slot(str)
+    def _on_file_failed(self, err: str):
+        self.file_error = err
+
     @Slot()
     def on_file_done(self):
+        # Sauvegarde complète des exports temps réel
+        self.export_writer.flush()
         # Réactive boutons et exports
         self.transcribing_file = False
         # Réactiver exports TXT/DOCX
@@ -773,17 +2935,23 @@ class WhisperGUI(QMainWindow):
         # Restauration de l’UI bloquée
         self.model_combo.setEnabled(True)
         self.device_combo.setEnabled(True)
-        QMessageBox.information(self, self.tr("OK"), self.tr("File transcription finished."))
+        if self.file_error:
+            QMessageBox.critical(
+                self, self.tr("Error"),
+                self.tr("File transcription failed: {err}").format(err=self.file_error)
+            )
+        else:
+            QMessageBox.information(self, self.tr("OK"), self.tr("File transcription finished."))
         self.waveform.stop_animation()
         try: self.trans_file_thread.audio_chunk.disconnect(self.waveform.update_audio_data)
         except: pass
 
     def start_file_transcription(self):
         # Réinitialisation de l’interface
-        self.text_display.clear()
-        self.history_text.clear()
+        self._clear_display()
         self.current_transcription = ""
         self.transcribing_file = True
+        self.file_error = None
         self.waveform.start_animation()
 
         # Désactiver le mode expert pendant la transcription
@@ -807,34 +2975,48 @@ class WhisperGUI(QMainWindow):
         self.model_combo.setEnabled(False)
         self.device_combo.setEnabled(False)
 
+        self.metrics.reset()
+
         # --- Calcul dynamique de la durée de chunk ---
-        # On charge l’audio pour en mesurer la durée totale
-        audio = whisper.load_audio(self.loaded_file_path)
-        sr = whisper.audio.SAMPLE_RATE
-        total_seconds = audio.shape[0] / sr
-
-        if total_seconds > 2 * 3600:
-            chunk_duration = 120
-        elif total_seconds > 3600:
-            chunk_duration = 60
-        elif total_seconds > 30 * 60:
-            chunk_duration = 45
-        else:
-            chunk_duration = self.spn_chunk.value()
+        # Durée lue dans les métadonnées, sans décoder le fichier
+        total_seconds = AudioFileReader(self.loaded_file_path).duration() or 0
+        chunk_duration = auto_chunk_seconds(total_seconds, self.spn_chunk.value())
+
+        options = dict(
+            chunk_s   = chunk_duration,
+            spp       = self.spn_spp.value(),
+            beam_size = self.spn_beam.value(),
+            best_of   = self.spn_best.value(),
+            overlap_s = self.spn_overlap.value(),
+            batched   = self.chk_batched.isChecked() and self.device_combo.currentText() == "GPU",
+            language  = self.cmb_language.currentData(),
+        )
+        # Une reprise impose les paramètres d'origine
+        resume = self.resume_checkpoint
+        self.resume_checkpoint = None
+        if resume:
+            params = resume["params"]
+            options.update({key: params[key] for key in options})
 
         # --- Lancement du thread de transcription fichier ---
         self.trans_file_thread = FileTranscribeThread(
             infile    = self.loaded_file_path,
             model     = self.model,
             model_name= self.current_model_name,
-            chunk_s   = chunk_duration,
-            spp       = self.spn_spp.value(),
-            beam_size = self.spn_beam.value(),
-            best_of   = self.spn_best.value()
+            workers   = self.spn_workers.value() if self.device_combo.currentText() == "CPU" else 1,
+            precision = self.cmb_precision.currentText(),
+            cache     = TranscriptCache() if self.chk_cache.isChecked() else None,
+            checkpoints = CheckpointStore(),
+            resume    = resume,
+            audio_hash = self.loaded_file_hash,
+            metrics   = self.metrics,
+            backend   = self.backend,
+            **options
         )
         self.trans_file_thread.audio_chunk.connect(self.waveform.update_audio_data)
         self.trans_file_thread.progress   .connect(self._on_file_progress)
         self.trans_file_thread.segment    .connect(self._on_file_segment)
+        self.trans_file_thread.failed     .connect(self._on_file_failed)
         self.trans_file_thread.done       .connect(self.on_file_done)
         self.trans_file_thread.start()
 
@@ -842,9 +3024,14 @@ class WhisperGUI(QMainWindow):
         if not self.model or self.model_combo.isEnabled()==False:
             QMessageBox.warning(self, self.tr("Wait"), self.tr("The model is not yet loaded."))
             return
+        try:
+            import sounddevice as sd   # PortAudio chargé seulement pour le micro
+        except (ImportError, OSError) as e:
+            QMessageBox.critical(self, self.tr("Error"),
+                                 self.tr("Audio input unavailable: {err}").format(err=e))
+            return
 
-        self.text_display.clear()
-        self.history_text.clear()
+        self._clear_display()
         self.current_transcription = ""
         # désactive exports
         self.chk_save_txt.setEnabled(False)
@@ -854,12 +3041,31 @@ class WhisperGUI(QMainWindow):
         self.chk_expert.setEnabled(False)
         self.grp_exp    .setEnabled(False)
 
+        self.current_segment_start = None
+        self.metrics.reset()
+
+        # Paramètres lus ici : le thread de traitement ne touche pas aux widgets.
+        # File et tampon repartent de zéro (positions absolues synchronisées)
+        self.live = LiveTranscriber(
+            self.model,
+            backend      = self.backend,
+            sample_rate  = self.sample_rate,
+            blocksize    = self.blocksize,
+            pause_ms     = self.spn_pause.value(),
+            threshold_db = self.spn_vad.value(),
+            max_lag_s    = self.spn_lag.value(),
+            language     = self.cmb_language.currentData(),
+            metrics      = self.metrics,
+            on_update    = self.update_text.emit,
+            on_segment   = self._on_live_segment
+        )
+
         self.recording = True
         self.record_button.setText(self.tr("Stop recording"))
         self.waveform.start_animation()
 
         # Start processing thread
-        self.process_thread = threading.Thread(target=self.process_audio)
+        self.process_thread = threading.Thread(target=self.live.run)
         self.process_thread.start()
 
         self.model_combo.setEnabled(False)
@@ -894,91 +3100,96 @@ class WhisperGUI(QMainWindow):
             self.stream.stop()
             self.stream.close()
 
+        # Le thread valide et publie le segment en cours avant de s'arrêter
+        if self.live:
+            self.live.stop()
         if self.process_thread:
             self.process_thread.join()
 
-        # Sauvegarde finale du segment en cours
-        if self.current_transcription.strip():
-            current_time = time.time()
-            end_time = datetime.fromtimestamp(current_time)
-            start_time = datetime.fromtimestamp(
-                self.current_segment_start or (current_time - 15))
-            timestamp = f"[{start_time.strftime('%H:%M:%S')}-{end_time.strftime('%H:%M:%S')}]"
-            
-            final_text = f"{timestamp} {self.current_transcription.strip()}"
-            self.history_text.append(final_text)
-            
-            # Écriture temps réel
-            self.write_realtime(final_text)
-
-    def audio_callback(self, indata, frames, time, status):
+        self.export_writer.flush()
+
+    def audio_callback(self, indata, frames, time_info, status):
         """Callback for audio input"""
         if status:
             print(status)
-        # Add the new audio data to the queue
-        self.audio_queue.put(indata.copy())
-        self.waveform.update_audio_data(indata.copy())
+        mono = indata[:, 0]
+        self.live.feed(mono)
+        # Niveaux seulement : l'affichage les relève à son rythme
+        self.waveform.meter.publish(mono)
 
-    def merge_text(self, text1, text2):
-        """
-        Merge two texts intelligently, keeping the context and avoiding duplicates
-        """
-        if not text1:
-            return text2
-
-        # Tìm phần chung dài nhất giữa cuối text1 và đầu text2
-        words1 = text1.lower().split()
-        words2 = text2.lower().split()
-
-        max_overlap = 0
-        overlap_pos = 0
-
-        # Tìm vị trí overlap tốt nhất
-        for i in range(len(words1)):
-            for j in range(len(words2)):
-                k = 0
-                while (i + k < len(words1) and
-                       k < len(words2) and
-                       words1[i + k] == words2[k]):
-                    k += 1
-                if k > max_overlap:
-                    max_overlap = k
-                    overlap_pos = i
-
-        if max_overlap > 0:
-            # Kết hợp text với phần overlap
-            result = " ".join(words1[:overlap_pos] + words2)
-        else:
-            # Nếu không có overlap, nối trực tiếp
-            result = text1 + " " + text2
+    def _add_newline(self):
+        # Le segment vient d'être clos : il rejoint la partie figée
+        self._reset_live()
+        self._replace_tail("")
 
-        return result
+    def _reset_live(self):
+        self.live_formatter = TranscriptFormatter()
+        self.live_committed = ""
+        self.live_lines = []
 
-    def _add_newline(self):
-        if len(self.text_display.toPlainText().strip()) > 0:
-            self.text_display.append("")
+    def _clear_display(self):
+        self.text_display.clear()
+        self.history_text.clear()
+        self.shown_history = 0
+        self.tail_start = 0
+        self._reset_live()
 
-    def update_display(self, text):
+    def _replace_tail(self, text: str):
         """
-        Récupère l'historique + le segment courant, formate l'ensemble
-        et met à jour le QTextEdit en temps réel.
+        Ajoute une seule fois les entrées d'historique pas encore affichées,
+        puis remplace le bloc provisoire de fin de document par `text`
+        (déjà mis en forme).
+        Le coût ne dépend que de la taille des morceaux modifiés.
         """
-        # 1) Concatène l’historique et le nouveau segment
-        full = ""
-        if self.history_text:
-            full = "\n".join(self.history_text) + "\n\n"
-        full += text
-
-        # 2) Formate tout de suite
-        formatted = format_transcription_text(full)
-
-        # 3) Affiche
-        self.text_display.setPlainText(formatted)
-
-        # 4) Replace le curseur à la fin
-        cursor = self.text_display.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.text_display.setTextCursor(cursor)
+        bar = self.text_display.verticalScrollBar()
+        scroll = bar.value()
+        at_bottom = scroll >= bar.maximum() - 4
+
+        cursor = QTextCursor(self.text_display.document())
+        cursor.setPosition(self.tail_start)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.beginEditBlock()
+
+        # 1) Historique figé : formaté et inséré une fois pour toutes
+        new_entries = self.history_text[self.shown_history:]
+        if new_entries:
+            self.shown_history += len(new_entries)
+            cursor.insertText("".join(
+                format_transcription_text(entry) + "\n\n" for entry in new_entries
+            ))
+            self.tail_start = cursor.position()
+
+        # 2) Bloc provisoire, remplacé à chaque décodage
+        cursor.insertText(text)
+        cursor.endEditBlock()
+
+        # 3) On suit la fin seulement si l'utilisateur y était déjà
+        bar.setValue(bar.maximum() if at_bottom else scroll)
+
+    def update_display(self, committed, tentative, captured_at):
+        """
+        Met à jour le QTextEdit en temps réel : l'historique est ajouté une
+        seule fois, seul le segment courant est remplacé sur place. Seule la
+        partie nouvellement validée passe par le formateur ; la partie
+        provisoire est mise en forme sur une copie de son état.
+        """
+        t0 = time.perf_counter()
+        if not committed.startswith(self.live_committed):
+            # Segment repris de zéro (décrochage) : on reformate
+            self._reset_live()
+        self.live_lines.extend(self.live_formatter.feed(committed[len(self.live_committed):]))
+        self.live_committed = committed
+
+        tail = self.live_formatter.copy()
+        lines = self.live_lines + tail.feed(tentative)
+        last = tail.flush()
+        if last:
+            lines.append(last)
+        self.metrics.record("format", time.perf_counter() - t0)
+        self._replace_tail("\n".join(lines))
+
+        # Latence de bout en bout : capture du bloc -> texte affiché
+        self.metrics.record("display", time.time() - captured_at)
 
     def closeEvent(self, event):
         # Arrête proprement l’enregistrement live
@@ -990,19 +3201,18 @@ class WhisperGUI(QMainWindow):
             self.trans_file_thread.stop()
             self.trans_file_thread.wait()
 
+        for thread in self.hash_threads:
+            thread.requestInterruption()
+            thread.wait()
+
         # Si le loader de modèle tourne toujours, on l’arrête aussi
         if hasattr(self, 'loader') and self.loader.isRunning():
             self.loader.terminate()
             self.loader.wait()
 
-        # Ferme les fichiers temps-réel s’ils sont ouverts
-        if getattr(self, 'txt_file', None):
-            self.txt_file.close()
-        if getattr(self, 'docx_doc', None):
-            try:
-                self.docx_doc.save(self.le_docx_path.text())
-            except:
-                pass
+        # Écrit et ferme les fichiers temps-réel s’ils sont ouverts
+        self.export_writer.close()
+        self.metrics.close()
 
         super().closeEvent(event)
 
@@ -1010,7 +3220,165 @@ class WhisperGUI(QMainWindow):
 
 from PySide6.QtCore import QTranslator, QLocale
 
+def collect_audio_files(inputs) -> list:
+    """Fichiers audio des entrées (fichiers ou répertoires, non récursif)."""
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Entrée ignorée (introuvable) : {path}")
+    return files
+
+def run_batch(args) -> int:
+    """
+    Mode sans interface : transcrit chaque fichier avec le même modèle et
+    écrit les exports TXT/DOCX. Retourne le code de sortie du processus.
+    """
+    files = collect_audio_files(args.batch)
+    if not files:
+        print("Aucun fichier audio à transcrire.")
+        return 1
+    # Exports nommés d'après le nom du fichier seul : deux entrées de même
+    # nom s'écraseraient dans --out-dir
+    by_name = {}
+    for path in files:
+        by_name.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+    clashes = [paths for paths in by_name.values() if len(paths) > 1]
+    if clashes:
+        for paths in clashes:
+            print("Même nom de sortie pour : " + ", ".join(paths))
+        print("Transcrivez-les séparément (--out-dir différents).")
+        return 2
+
+    backend = get_backend(args.backend)
+    # Seul whisper a besoin de torch (et donc du sondage CUDA)
+    whisper_backend = isinstance(backend, WhisperBackend)
+    device = args.device or ("cuda" if whisper_backend and torch.cuda.is_available() else "cpu")
+    print(f"Chargement du modèle {args.model} ({device}, {args.precision})…")
+    if whisper_backend:
+        apply_cpu_threads()
+    model = backend.load(args.model, device, args.precision)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    total_audio = total_elapsed = 0.0
+    failures = 0
+    checkpoints = CheckpointStore()
+    metrics = PipelineMetrics()
+    if args.metrics:
+        metrics.open(args.metrics)
+    for path in files:
+        name = os.path.basename(path)
+        paragraphs = []
+        duration = AudioFileReader(path).duration() or 0
+        # Reprise automatique si les paramètres sont identiques
+        audio_hash = file_content_hash(path)
+        resume = None if args.restart else checkpoints.load(audio_hash)
+        transcriber = FileTranscriber(
+            path, model, args.model,
+            chunk_s   = auto_chunk_seconds(duration, args.chunk),
+            spp       = args.spp,
+            beam_size = args.beam_size,
+            best_of   = args.best_of,
+            overlap_s = args.overlap,
+            workers   = args.workers if device == "cpu" else 1,
+            batched   = args.batched and device == "cuda",
+            precision = args.precision,
+            language  = args.language,
+            cache     = None if args.no_cache else TranscriptCache(),
+            checkpoints = checkpoints,
+            resume    = resume,
+            audio_hash = audio_hash,
+            metrics   = metrics,
+            backend   = backend,
+            on_segment  = paragraphs.append,
+            on_progress = lambda cur, tot, name=name: print(
+                f"\r{name}: {cur}/{tot or '?'}", end="", flush=True)
+        )
+
+        metrics.reset()
+        t0 = time.time()
+        try:
+            transcriber.run()
+        except Exception:
+            print(f"\nErreur sur {path} :")
+            traceback.print_exc()
+            failures += 1
+            continue
+        elapsed = time.time() - t0
+        # Audio traité par cette exécution (hors partie reprise d'un checkpoint)
+        audio_s = transcriber.audio_seconds - transcriber.resumed_seconds
+        if audio_s <= 0:
+            print(f"\nErreur sur {path} : aucun audio transcrit.")
+            failures += 1
+            continue
+
+        base = os.path.join(args.out_dir, os.path.splitext(name)[0])
+        if "txt" in args.format:
+            write_txt(paragraphs, base + ".txt")
+        if "docx" in args.format:
+            write_docx(paragraphs, base + ".docx")
+
+        total_audio += audio_s
+        total_elapsed += elapsed
+        print(f"\r{name}: {audio_s:.1f} s audio in {elapsed:.1f} s "
+              f"(RTF {elapsed / audio_s:.3f})")
+        metrics.write(file=path, audio_s=audio_s, elapsed_s=elapsed)
+
+    print(f"{len(files) - failures}/{len(files)} files, {total_audio:.1f} s audio in "
+          f"{total_elapsed:.1f} s ({total_audio / max(total_elapsed, 1e-6):.1f}x real time)")
+    metrics.close()
+    return 1 if failures else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Whisper GUI - real-time and batch transcription"
+    )
+    parser.add_argument("--batch", nargs="+", metavar="INPUT",
+                        help="headless mode: audio files or directories to transcribe")
+    parser.add_argument("--model", default="small",
+                        help="Whisper model (tiny, base, small, medium, large)")
+    parser.add_argument("--device", choices=["cpu", "cuda"],
+                        help="device (default: cuda if available)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="fp32")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help="transcription backend (default: $WHISPER_GUI_BACKEND or whisper)")
+    parser.add_argument("--language", help="language code (default: detect once per file)")
+    parser.add_argument("--chunk", type=int, default=30, help="chunk length in seconds")
+    parser.add_argument("--overlap", type=int, default=0, help="chunk overlap in seconds")
+    parser.add_argument("--spp", type=int, default=3, help="sentences per paragraph")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--best-of", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parallel worker processes (CPU only)")
+    parser.add_argument("--batched", action="store_true",
+                        help="batched decoding (GPU only)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not reuse or store cached transcripts")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore checkpoints of interrupted transcriptions")
+    parser.add_argument("--out-dir", default=".", help="output directory")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="append per-file pipeline metrics to a JSON-lines file")
+    parser.add_argument("--format", nargs="+", choices=["txt", "docx"], default=["txt"])
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="print startup timings as JSON and quit once the model is ready")
+    # Les options inconnues sont laissées à Qt ; en mode batch, aucune ne l'est
+    args, unknown = parser.parse_known_args(argv)
+    if args.batch and unknown:
+        parser.error("unrecognized arguments: " + " ".join(unknown))
+    return args
+
 def main():
+    args = parse_args()
+    if args.batch:
+        sys.exit(run_batch(args))
+
     app = QApplication(sys.argv)
 
     # — Détection automatique de la langue utilisateur (français/anglais sinon anglais par défaut)
@@ -1030,7 +3398,9 @@ def main():
         # sinon, laisse sans traduction
 
     window = WhisperGUI()
+    window.exit_when_ready = args.measure_startup
     window.show()
+    QTimer.singleShot(0, window.mark_window_visible)
     sys.exit(app.exec())
 
 